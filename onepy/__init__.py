@@ -6,5 +6,12 @@ from __future__ import absolute_import
 
 from .onepy import *
 from .onmanager import ONProcess
+from .supervisor import ONTimeoutError
+from .attachments import export_attachments
+from .backend import RecordingBackend, ReplayBackend
+from .dedup import find_duplicates
+from .export import export_pages
+from .links import LinkGraph, HyperlinkResolver
+from .tags import TagIndex
 
 __version__ = "0.2.1"
\ No newline at end of file
@@ -0,0 +1,148 @@
+"""
+  Attachment export
+  Copies the files inserted in pages into a content-addressed store
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+from .paths import page_path, safe_name
+
+__all__ = ["export_attachments"]
+
+MANIFEST = "manifest.json"
+CHUNK_SIZE = 1 << 20
+
+
+def export_attachments(onenote, dest, pages=None, workers=4):
+    """Export every InsertedFile and MediaFile of pages to dest.
+
+    Each distinct content is stored once as dest/blobs/<sha[:2]>/<sha>, and
+    hardlinked as dest/pages/<notebook>/<section>/<page>/<file name> for
+    every object using it; the page ID is added to clashing page folders and
+    the object ID to clashing file names. dest/manifest.json maps page and
+    object IDs to their file and hash. Sources whose
+    size and mtime did not change since the last run are not read again.
+    Page content is fetched serially, files are copied by a thread pool.
+    """
+    if pages is None:
+        pages = onenote.pages()
+    os.makedirs(os.path.join(dest, "blobs"), exist_ok=True)
+    previous = _load_manifest(dest)
+
+    objects = []
+    sources = {}
+    folders = set()
+    for page in pages:
+        content = onenote.get_page_content(page.id)
+        folder = page_path(page, folders)
+        folders.add(folder)
+        names = set()
+        for attachment in content.query("//one:InsertedFile | //one:MediaFile"):
+            source = _source_path(attachment)
+            name = safe_name(attachment.preferred_name or attachment.id)
+            if name in names:
+                root, ext = os.path.splitext(name)
+                name = safe_name("{} {}".format(root, attachment.id)) + ext
+            names.add(name)
+            objects.append({
+                "page_id": page.id,
+                "page_name": page.name,
+                "object_id": attachment.id,
+                "name": attachment.preferred_name,
+                "file": os.path.join("pages", folder, name),
+                "source": source,
+            })
+            if source is not None:
+                sources[source] = previous["sources"].get(source)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        stored = dict(zip(sources, pool.map(lambda s: _store(dest, s, sources[s]), sources)))
+
+    manifest = {"sources": {}, "objects": []}
+    for source, entry in stored.items():
+        if entry is not None:
+            manifest["sources"][source] = entry
+    for obj in objects:
+        entry = stored.get(obj["source"])
+        obj["hash"] = entry["hash"] if entry is not None else None
+        if entry is not None:
+            _link(_blob_path(dest, entry["hash"]), os.path.join(dest, obj["file"]))
+        manifest["objects"].append(obj)
+
+    _write_manifest(dest, manifest)
+    return manifest
+
+
+def _source_path(attachment):
+    for path in (attachment.path_cache, attachment.path_source):
+        if path and os.path.isfile(path):
+            return path
+    return None
+
+
+def _store(dest, source, previous):
+    """Hash source while copying it to the store, unless it is unchanged"""
+    try:
+        stat = os.stat(source)
+    except OSError as e:
+        print("Could not read attachment {}: {}".format(source, e))
+        return None
+    if (previous is not None and previous["size"] == stat.st_size
+            and previous["mtime"] == stat.st_mtime
+            and os.path.exists(_blob_path(dest, previous["hash"]))):
+        return previous
+
+    digest = hashlib.sha256()
+    fd, tmp = tempfile.mkstemp(dir=os.path.join(dest, "blobs"))
+    try:
+        with open(source, "rb") as src, os.fdopen(fd, "wb") as dst:
+            for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                dst.write(chunk)
+        blob = _blob_path(dest, digest.hexdigest())
+        if os.path.exists(blob):
+            os.remove(tmp)
+        else:
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            os.replace(tmp, blob)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return {"size": stat.st_size, "mtime": stat.st_mtime, "hash": digest.hexdigest()}
+
+
+def _link(blob, target):
+    if os.path.exists(target):
+        if os.path.samefile(blob, target):
+            return
+        os.remove(target)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.link(blob, target)
+    except OSError:
+        shutil.copyfile(blob, target)
+
+
+def _blob_path(dest, sha):
+    return os.path.join(dest, "blobs", sha[:2], sha)
+
+
+def _load_manifest(dest):
+    try:
+        with open(os.path.join(dest, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"sources": {}, "objects": []}
+
+
+def _write_manifest(dest, manifest):
+    tmp = os.path.join(dest, MANIFEST + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp, os.path.join(dest, MANIFEST))
@@ -0,0 +1,135 @@
+"""
+  Backends
+  Stand-ins for the OneNote COM object used by ONProcess, to record a
+  session against OneNote and replay it later without it (e.g. on Linux)
+"""
+
+from collections import deque
+import datetime
+import gzip
+import json
+import time
+
+__all__ = ["RecordingBackend", "ReplayBackend", "RecordedError"]
+
+# calls changing OneNote, their payload depends on how onepy serializes it
+WRITES = frozenset(["CloseNotebook", "CreateNewPage", "DeleteHierarchy", "DeletePageContent",
+                    "NavigateTo", "OpenHierarchy", "OpenPackage", "Publish", "UpdateHierarchy",
+                    "UpdatePageContent"])
+
+
+class RecordedError(Exception):
+    """A COM error raised during the recorded session, with its args (HRESULT first)"""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.hresult = args[0] if args and isinstance(args[0], int) else None
+
+
+def _encode(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.decode("utf-8")
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    return value
+
+
+def _key(method, args):
+    return json.dumps([method, [_encode(a) for a in args]], default=str)
+
+
+class RecordingBackend():
+    """Forward every call to a OneNote COM object and record it to path.
+
+    Each call is stored with its arguments, result or error and latency
+    as one JSON line of a gzip archive. Close it when the session is over:
+
+        with RecordingBackend(com_object, "session.jsonl.gz") as backend:
+            on = OneNote(backend=backend)
+    """
+
+    def __init__(self, process, path):
+        self._process = process
+        self._archive = gzip.open(path, "wt", encoding="utf-8")
+
+    def __getattr__(self, name):
+        method = getattr(self._process, name)
+
+        def call(*args):
+            record = {"method": name, "args": [_encode(a) for a in args]}
+            start = time.perf_counter()
+            try:
+                result = method(*args)
+            except Exception as e:
+                record["error"] = str(e)
+                record["error_args"] = _encode(e.args)
+                raise
+            else:
+                record["result"] = _encode(result)
+            finally:
+                record["latency"] = time.perf_counter() - start
+                self._archive.write(json.dumps(record, default=str) + "\n")
+            return result
+
+        return call
+
+    def close(self):
+        self._archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ReplayBackend():
+    """Serve the calls of a session recorded by RecordingBackend.
+
+    Reads are matched on method and arguments, writes (WRITES) on method
+    and order only, so a session can be replayed by a onepy version that
+    serializes its updates differently; with exact_writes they are matched
+    on their arguments too. Repeated calls get the recorded responses in
+    order, the last one once they run out. Recorded errors are raised as
+    RecordedError with the original args, so busy errors can be retried.
+    With latency, each call sleeps for its recorded latency divided by
+    speed.
+    """
+
+    def __init__(self, path, latency=False, speed=1.0, exact_writes=False):
+        self.latency = latency
+        self.speed = speed
+        self.exact_writes = exact_writes
+        self._responses = {}
+        with gzip.open(path, "rt", encoding="utf-8") as archive:
+            for line in archive:
+                record = json.loads(line)
+                key = self._key(record["method"], record["args"])
+                self._responses.setdefault(key, deque()).append(record)
+
+    def _key(self, method, args):
+        if method in WRITES and not self.exact_writes:
+            return json.dumps([method])
+        return _key(method, args)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def call(*args):
+            return self._replay(name, args)
+
+        return call
+
+    def _replay(self, method, args):
+        responses = self._responses.get(self._key(method, args))
+        if not responses:
+            raise RecordedError("No recorded call to {}{}".format(method, tuple(args)))
+        record = responses.popleft() if len(responses) > 1 else responses[0]
+        if self.latency:
+            time.sleep(record["latency"] / self.speed)
+        if "error" in record:
+            raise RecordedError(*record.get("error_args") or [record["error"]])
+        return record["result"]
@@ -0,0 +1,197 @@
+"""
+  Dedup
+  Finds near-duplicate pages with MinHash signatures and LSH banding
+"""
+
+import html
+import os
+import re
+import zlib
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+__all__ = ["find_duplicates", "DuplicateCluster", "MinHasher"]
+
+PRIME = (1 << 31) - 1
+MAX_HASH = PRIME
+
+_TAG = re.compile(r"<[^>]+>")
+_WORD = re.compile(r"\w+")
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("numpy is required for duplicate detection")
+
+
+class MinHasher():
+    """Computes MinHash signatures of word shingles, num_perm hashes each"""
+
+    def __init__(self, num_perm=128, shingle_size=5, seed=1):
+        _require_numpy()
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, PRIME, num_perm).astype(np.uint64)[:, None]
+        self._b = rng.randint(0, PRIME, num_perm).astype(np.uint64)[:, None]
+
+    @property
+    def params(self):
+        return [self.num_perm, self.shingle_size, self.seed]
+
+    def shingles(self, text):
+        words = _WORD.findall(html.unescape(_TAG.sub(" ", text)).lower())
+        k = min(self.shingle_size, len(words))
+        hashes = {zlib.crc32(" ".join(words[i:i + k]).encode("utf-8")) & PRIME
+                  for i in range(len(words) - k + 1)} if k else set()
+        return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+    def signature(self, text, chunk_size=4096):
+        """MinHash signature of text, None if it has no words"""
+        shingles = self.shingles(text)
+        if not len(shingles):
+            return None
+        signature = np.full(self.num_perm, MAX_HASH, dtype=np.uint64)
+        for start in range(0, len(shingles), chunk_size):
+            chunk = shingles[None, start:start + chunk_size]
+            np.minimum(signature, ((self._a * chunk + self._b) % PRIME).min(axis=1), out=signature)
+        return signature.astype(np.uint32)
+
+
+class DuplicateCluster():
+    """Pages whose estimated Jaccard similarity is at least the threshold"""
+
+    def __init__(self, page_ids, similarity, pages=None):
+        self.page_ids = page_ids
+        self.similarity = similarity
+        self.pages = pages or []
+
+    def __iter__(self):
+        yield from self.pages
+
+    def __len__(self):
+        return len(self.page_ids)
+
+    def __repr__(self):
+        return "<DuplicateCluster of {} pages, similarity {:.2f}>".format(len(self), self.similarity)
+
+
+def page_text(content):
+    """The text of every OE of a PageContent"""
+    return "\n".join(content.query("//one:OE/one:T/text()"))
+
+
+def find_duplicates(onenote, pages=None, threshold=0.8, num_perm=128, bands=32,
+                    shingle_size=5, store_path=None):
+    """Clusters of near-duplicate pages, largest first.
+
+    Signatures are bucketed band by band (num_perm / bands rows each), and
+    only pages sharing a bucket are compared, so the cost stays roughly
+    linear in the number of pages. With store_path, signatures are kept
+    in a .npz file and only pages whose lastModifiedTime changed are
+    fetched and hashed again.
+    """
+    _require_numpy()
+    if num_perm % bands:
+        raise Exception("num_perm must be a multiple of bands")
+    if pages is None:
+        pages = onenote.pages()
+    hasher = MinHasher(num_perm, shingle_size)
+    stored = _load_signatures(store_path, hasher.params)
+
+    ids, times, signatures, by_id = [], [], [], {}
+    for page in pages:
+        known = stored.get(page.id)
+        if known is not None and known[0] == page.last_modified_time:
+            signature = known[1]
+        else:
+            signature = hasher.signature(page_text(onenote.get_page_content(page.id)))
+            if signature is None:
+                # pages without text are stored too, so they are not fetched again
+                signature = np.full(num_perm, MAX_HASH, dtype=np.uint32)
+        by_id[page.id] = page
+        ids.append(page.id)
+        times.append(page.last_modified_time or "")
+        signatures.append(signature)
+    matrix = (np.vstack(signatures) if signatures
+              else np.empty((0, num_perm), dtype=np.uint32))
+    if store_path is not None:
+        _save_signatures(store_path, hasher.params, ids, times, matrix)
+    has_text = (matrix != MAX_HASH).any(axis=1)
+    ids = [page_id for page_id, keep in zip(ids, has_text) if keep]
+    matrix = matrix[has_text]
+
+    parents = list(range(len(ids)))
+
+    def root(i):
+        while parents[i] != i:
+            parents[i] = parents[parents[i]]
+            i = parents[i]
+        return i
+
+    similar = {}
+    for i, j in _candidate_pairs(matrix, bands):
+        if (i, j) in similar:
+            continue
+        similarity = float(np.count_nonzero(matrix[i] == matrix[j])) / num_perm
+        similar[(i, j)] = similarity
+        if similarity >= threshold:
+            parents[root(i)] = root(j)
+
+    groups, scores = {}, {}
+    for i in range(len(ids)):
+        groups.setdefault(root(i), []).append(i)
+    for (i, j), similarity in similar.items():
+        if similarity >= threshold:
+            scores.setdefault(root(i), []).append(similarity)
+    clusters = []
+    for key, members in groups.items():
+        if len(members) < 2:
+            continue
+        page_ids = [ids[i] for i in members]
+        clusters.append(DuplicateCluster(page_ids, sum(scores[key]) / len(scores[key]),
+                                         [by_id[p] for p in page_ids]))
+    clusters.sort(key=lambda c: (-len(c), -c.similarity))
+    return clusters
+
+
+def _candidate_pairs(matrix, bands):
+    """Pairs of row indices (i < j) sharing the bucket of at least one band"""
+    rows = matrix.shape[1] // bands
+    # one 64 bit key per band, collisions only add candidates that get checked
+    mixers = np.random.RandomState(0).randint(1, 1 << 62, rows, dtype=np.int64).astype(np.uint64) | 1
+    for band in range(bands):
+        keys = (matrix[:, band * rows:(band + 1) * rows].astype(np.uint64) * mixers).sum(axis=1)
+        _, bucket = np.unique(keys, return_inverse=True)
+        shared = np.flatnonzero(np.bincount(bucket)[bucket] > 1)
+        if not len(shared):
+            continue
+        order = shared[np.argsort(bucket[shared], kind="stable")]
+        bounds = np.flatnonzero(np.diff(bucket[order])) + 1
+        for members in np.split(order, bounds):
+            if len(members) > 1:
+                members = members.tolist()
+                for n, i in enumerate(members):
+                    for j in members[n + 1:]:
+                        yield (i, j) if i < j else (j, i)
+
+
+def _load_signatures(path, params):
+    if path is None or not os.path.exists(path):
+        return {}
+    with np.load(path) as data:
+        if data["params"].tolist() != params:
+            return {}
+        return {page_id: (time or None, signature) for page_id, time, signature
+                in zip(data["ids"].tolist(), data["times"].tolist(), data["signatures"])}
+
+
+def _save_signatures(path, params, ids, times, matrix):
+    with open(path + ".tmp", "wb") as f:
+        np.savez_compressed(f, params=np.array(params), ids=np.array(ids, dtype=str),
+                            times=np.array(times, dtype=str), signatures=matrix)
+    os.replace(path + ".tmp", path)
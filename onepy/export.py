@@ -0,0 +1,204 @@
+"""
+  Export
+  Renders page content to Markdown or HTML files
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import base64
+import html
+import json
+import os
+import re
+import urllib.parse
+
+import lxml.etree as ET
+
+from .paths import page_path, safe_name
+
+__all__ = ["export_pages", "render_page"]
+
+STATE = ".onepy-export-{}.json"
+EXTENSIONS = {"md": ".md", "html": ".html"}
+
+_LINK = re.compile(r'<a\s[^>]*href="([^"]*)"[^>]*>(.*?)</a>', re.S | re.I)
+_TAG = re.compile(r"<[^>]+>")
+
+
+def export_pages(onenote, dest, pages=None, fmt="md", workers=None, chunksize=8,
+                 include_images=False):
+    """Export pages (every page by default) to dest, one file per page.
+
+    Files are laid out as notebook/section groups/section/page. Page XML is
+    fetched serially and rendered by a pool of worker processes while the
+    next pages are fetched, with at most chunksize pages per worker in
+    flight; each page is written as soon as it is rendered. Pages whose
+    lastModifiedTime did not change since the last export are skipped.
+    With include_images, images are fetched too and saved next to the page.
+
+    As worker processes are started, on Windows this must be called from
+    under an if __name__ == "__main__" guard.
+    """
+    if fmt not in EXTENSIONS:
+        raise Exception("Invalid export format: {}".format(fmt))
+    if pages is None:
+        pages = onenote.pages()
+    state = _load_state(dest, fmt)
+    used = {entry["file"] for entry in state.values()}
+    todo = (p for p in pages
+            if p.id not in state or state[p.id]["last_modified_time"] != p.last_modified_time)
+    page_info = 1 if include_images else 0
+    written = []
+    pending = deque()
+
+    def finish():
+        page, path, future = pending.popleft()
+        text, images = future.result()
+        _write_page(dest, path, text, images)
+        state[page.id] = {"file": path, "last_modified_time": page.last_modified_time}
+        written.append(path)
+        if len(written) % window == 0:
+            _save_state(dest, fmt, state)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        window = chunksize * (workers or os.cpu_count() or 1)
+        try:
+            for page in todo:
+                path = state.get(page.id, {}).get("file")
+                if path is None:
+                    path = _page_file(page, fmt, used)
+                    used.add(path)
+                job = (onenote.process.get_page_content(page.id, page_info),
+                       onenote.process.namespace, fmt, _files_folder(path))
+                pending.append((page, path, pool.submit(render_page, job)))
+                while pending and (len(pending) > window or pending[0][2].done()):
+                    finish()
+            while pending:
+                finish()
+        finally:
+            _save_state(dest, fmt, state)
+
+    return written
+
+
+def render_page(job):
+    """Render (page xml, namespace, fmt, image folder) to (text, [(image name, bytes)])"""
+    xml, namespace, fmt, files = job
+    renderer = _Renderer(namespace, fmt, files)
+    renderer.page(ET.fromstring(xml))
+    return "\n".join(renderer.lines) + "\n", renderer.images
+
+
+class _Renderer():
+
+    def __init__(self, namespace, fmt, files):
+        self.ns = namespace
+        self.html = fmt == "html"
+        self.files = files
+        self.lines = []
+        self.images = []
+
+    def page(self, xml):
+        name = xml.get("name") or ""
+        if self.html:
+            self.lines.append("<html><head><meta charset=\"utf-8\"><title>{}</title></head><body>"
+                              .format(html.escape(name)))
+        for node in xml:
+            if node.tag == self.ns + "Title":
+                title = "".join(self.text(t) for t in node.iter(self.ns + "T"))
+                self.lines.append("<h1>{}</h1>".format(title) if self.html else "# " + title)
+            elif node.tag == self.ns + "Outline":
+                for children in node.iterchildren(self.ns + "OEChildren"):
+                    self.oe_children(children, 0)
+            else:
+                self.file(node, 0)
+        if self.html:
+            self.lines.append("</body></html>")
+
+    def oe_children(self, xml, level):
+        if self.html:
+            self.lines.append("<ul>")
+        for oe in xml.iterchildren(self.ns + "OE"):
+            self.oe(oe, level)
+        if self.html:
+            self.lines.append("</ul>")
+
+    def oe(self, xml, level):
+        if self.html:
+            self.lines.append("<li>")
+        for node in xml:
+            if node.tag == self.ns + "T":
+                text = self.text(node)
+                self.lines.append(text if self.html else "  " * level + "- " + text)
+            elif node.tag == self.ns + "OEChildren":
+                self.oe_children(node, level + 1)
+            else:
+                self.file(node, level)
+        if self.html:
+            self.lines.append("</li>")
+
+    def file(self, xml, level):
+        indent = "" if self.html else "  " * level + "- "
+        if xml.tag == self.ns + "Image":
+            data = xml.find(self.ns + "Data")
+            if data is None or not data.text:
+                return
+            name = "{}.{}".format(safe_name(xml.get("objectID") or str(len(self.images))),
+                                  xml.get("format") or "png")
+            self.images.append((name, base64.b64decode(data.text)))
+            src = urllib.parse.quote(self.files + "/" + name)
+            self.lines.append(indent + ('<img src="{}">'.format(src) if self.html
+                                        else "![]({})".format(src)))
+        elif xml.tag in (self.ns + "InsertedFile", self.ns + "MediaFile"):
+            path = xml.get("pathSource") or xml.get("pathCache") or ""
+            url = "file:///" + path.replace("\\", "/").lstrip("/")
+            name = xml.get("preferredName") or os.path.basename(path)
+            self.lines.append(indent + ('<a href="{}">{}</a>'.format(html.escape(url), html.escape(name))
+                                        if self.html else "[{}](<{}>)".format(name, url)))
+
+    def text(self, xml):
+        """T content is an HTML fragment, kept for HTML and flattened for Markdown"""
+        text = xml.text or ""
+        if self.html:
+            return text
+        text = _LINK.sub(lambda m: "[{}]({})".format(m.group(2), m.group(1)), text)
+        return html.unescape(_TAG.sub("", text))
+
+
+def _page_file(page, fmt, used):
+    return page_path(page, used, EXTENSIONS[fmt])
+
+
+def _files_folder(path):
+    """Folder holding the images of the page at path, relative to it"""
+    return os.path.basename(os.path.splitext(path)[0]) + "_files"
+
+
+def _write_page(dest, path, text, images):
+    target = os.path.join(dest, path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    if images:
+        files = os.path.join(os.path.dirname(target), _files_folder(path))
+        os.makedirs(files, exist_ok=True)
+        for name, data in images:
+            with open(os.path.join(files, name), "wb") as f:
+                f.write(data)
+    with open(target, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _load_state(dest, fmt):
+    try:
+        with open(os.path.join(dest, STATE.format(fmt)), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(dest, fmt, state):
+    os.makedirs(dest, exist_ok=True)
+    path = os.path.join(dest, STATE.format(fmt))
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
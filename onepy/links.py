@@ -0,0 +1,186 @@
+"""
+  Links
+  The graph of onenote: hyperlinks between pages
+"""
+
+from array import array
+import html
+import json
+import os
+import re
+import urllib.parse
+
+import lxml.etree as ET
+
+__all__ = ["LinkGraph", "HyperlinkResolver"]
+
+_HREF = re.compile(r'href\s*=\s*"(onenote:[^"]*)"', re.I)
+_TARGET = re.compile(r"(page-id|section-id)=(\{[0-9a-f-]+\})", re.I)
+_TARGETS = ("//one:Section[not(ancestor::one:SectionGroup[@isRecycleBin])]"
+            " | //one:Page[not(ancestor::one:SectionGroup[@isRecycleBin])]")
+
+
+def link_key(href):
+    """(kind, GUID) identifying the target of a onenote: link, None if it has none"""
+    found = dict((kind.lower(), guid.lower())
+                 for kind, guid in _TARGET.findall(urllib.parse.unquote(href)))
+    for kind in ("page-id", "section-id"):
+        if kind in found:
+            return (kind, found[kind])
+    return None
+
+
+class HyperlinkResolver():
+    """Maps onenote: links to hierarchy IDs.
+
+    The hyperlink of every object is asked to OneNote once (one COM call
+    each) and memoized, in the JSON file at path if given, so later runs
+    only ask for new objects. Failed calls (OneNote busy or syncing) are
+    only remembered until the next build(), which asks for them again.
+    """
+
+    def __init__(self, process, path=None):
+        self.process = process
+        self.path = path
+        self._links = {}
+        self._failed = set()
+        self._targets = None
+        if path is not None and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._links = {k: v for k, v in json.load(f).items() if v is not None}
+
+    def hyperlink(self, object_id):
+        if object_id not in self._links and object_id not in self._failed:
+            link = self.process.get_hyperlink_to_object(object_id)
+            if link is None:
+                self._failed.add(object_id)
+                return None
+            self._links[object_id] = link
+            self._targets = None
+        return self._links.get(object_id)
+
+    def build(self, nodes):
+        """Fetch the hyperlinks of the nodes not known yet, in one go.
+
+        nodes are every node links may point to: the objects missing from
+        them are forgotten, so links to deleted pages no longer resolve.
+        """
+        ids = {node.id for node in nodes}
+        self._failed = set()
+        gone = [object_id for object_id in self._links if object_id not in ids]
+        for object_id in gone:
+            del self._links[object_id]
+        if gone:
+            self._targets = None
+        missing = [object_id for object_id in ids if object_id not in self._links]
+        fetched = [object_id for object_id in missing if self.hyperlink(object_id) is not None]
+        if (fetched or gone) and self.path is not None:
+            self.save()
+
+    def resolve(self, href):
+        """ID of the object href points to, None if it is not known"""
+        if self._targets is None:
+            self._targets = {}
+            for object_id, link in self._links.items():
+                key = link_key(link)
+                if key is not None:
+                    self._targets.setdefault(key, object_id)
+        key = link_key(href)
+        return self._targets.get(key) if key is not None else None
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._links, f)
+        os.replace(tmp, self.path)
+
+
+class LinkGraph():
+    """Links between pages (and the sections they point to).
+
+    Node IDs are numbered in ids; forward and backward adjacency are kept
+    as compressed rows: the neighbours of node n are
+    targets[offsets[n]:offsets[n + 1]].
+    """
+
+    def __init__(self):
+        self.ids = []
+        self.sources = set()
+        self.broken = []
+        self._positions = {}
+        self._forward = (array("i", [0]), array("i"))
+        self._backward = (array("i", [0]), array("i"))
+
+    @classmethod
+    def build(cls, onenote, pages=None, resolver=None):
+        """Scan the text of pages (every page by default) for onenote: links.
+
+        The hyperlinks of all sections and pages are resolved in bulk first,
+        through resolver (a fresh HyperlinkResolver by default). Links to
+        anything outside the hierarchy, recycle bins included, are broken.
+        """
+        if pages is None:
+            pages = list(onenote.pages())
+        if resolver is None:
+            resolver = HyperlinkResolver(onenote.process)
+        resolver.build(onenote.query(_TARGETS))
+
+        graph = cls()
+        t_tag = onenote.process.namespace + "T"
+        edges = set()
+        for page in pages:
+            source = graph._position(page.id)
+            graph.sources.add(source)
+            xml = ET.fromstring(onenote.process.get_page_content(page.id))
+            for node in xml.iter(t_tag):
+                for href in _HREF.findall(node.text or ""):
+                    href = html.unescape(href)
+                    target = resolver.resolve(href)
+                    if target is None:
+                        graph.broken.append((page.id, href))
+                    elif target != page.id:
+                        edges.add((source, graph._position(target)))
+        graph._forward = _compress(len(graph.ids), sorted(edges))
+        graph._backward = _compress(len(graph.ids), sorted((b, a) for a, b in edges))
+        return graph
+
+    def _position(self, object_id):
+        if object_id not in self._positions:
+            self._positions[object_id] = len(self.ids)
+            self.ids.append(object_id)
+        return self._positions[object_id]
+
+    def _neighbours(self, adjacency, object_id):
+        n = self._positions.get(object_id)
+        if n is None:
+            return []
+        offsets, targets = adjacency
+        return [self.ids[i] for i in targets[offsets[n]:offsets[n + 1]]]
+
+    def links(self, object_id):
+        """IDs of the objects linked from object_id"""
+        return self._neighbours(self._forward, object_id)
+
+    def backlinks(self, object_id):
+        """IDs of the pages linking to object_id"""
+        return self._neighbours(self._backward, object_id)
+
+    def orphans(self):
+        """IDs of the scanned pages no other page links to"""
+        offsets = self._backward[0]
+        return [self.ids[n] for n in sorted(self.sources) if offsets[n] == offsets[n + 1]]
+
+    def broken_links(self):
+        """(page ID, href) of the links whose target is unknown"""
+        return list(self.broken)
+
+
+def _compress(count, edges):
+    """Sorted (from, to) pairs to compressed rows"""
+    offsets = array("i", [0] * (count + 1))
+    targets = array("i", (b for _, b in edges))
+    for a, _ in edges:
+        offsets[a + 1] += 1
+    for n in range(count):
+        offsets[n + 1] += offsets[n]
+    return offsets, targets
@@ -1,6 +1,11 @@
 from .onmanager import ONProcess
 import lxml.etree as ET
 from lxml.builder import ElementMaker
+import bisect
+import functools
+import html
+import itertools
+import datetime
 import time
 import re
 
@@ -8,27 +13,245 @@ __all__ = ["OneNote", "PageEditor"]
 
 namespace = ""
 
+# lastModifiedTime & co. as a number XPath 1.0 can compare, e.g. 20160120101112
+XPATH_TIME = "number(translate(substring({}, 1, 19), '-:T', ''))"
+
+_TAG = re.compile(r"<[^>]+>")
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_xpath(expression, ns):
+    return ET.XPath(expression, namespaces={"one": ns}, smart_strings=False)
+
+
+def _xpath_time(value):
+    """value as the number XPATH_TIME makes of a UTC timestamp, naive datetimes are UTC"""
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(datetime.timezone.utc)
+        value = value.strftime("%Y-%m-%dT%H:%M:%S")
+    return float(re.sub(r"[-:T]", "", value[:19]))
+
+
+def _name_set(names):
+    if names is None:
+        return None
+    if isinstance(names, str):
+        return {names}
+    return set(names)
+
+
+def _plain_text(text):
+    """T content is an HTML fragment"""
+    return html.unescape(_TAG.sub("", text)) if "<" in text or "&" in text else text
+
+
+def _infer_column(values):
+    """Blank cells don't decide the type, they are masked out of int, float and bool columns"""
+    import numpy as np
+    stripped = [v.strip() for v in values]
+    blank = [not v for v in stripped]
+    if all(blank):
+        return np.array(values, dtype=str)
+
+    def masked(data):
+        return np.ma.masked_array(data, mask=blank) if any(blank) else data
+
+    for dtype, fill in ((np.int64, "0"), (np.float64, "nan")):
+        try:
+            return masked(np.array([fill if b else v for v, b in zip(stripped, blank)], dtype=dtype))
+        except (ValueError, OverflowError):
+            pass
+    lowered = [v.lower() for v in stripped]
+    if all(b or v in ("true", "false") for v, b in zip(lowered, blank)):
+        return masked(np.array([v == "true" for v in lowered], dtype=bool))
+    return np.array(values, dtype=str)
+
+
+def _run_query(xml, expression, variables, known=None):
+    """Evaluate a cached, compiled XPath on xml and wrap matching elements"""
+    xpath = _compile_xpath(expression, namespace.strip("{}"))
+    result = xpath(xml, **variables)
+    if not isinstance(result, list):
+        return result
+    wrapped = []
+    for node in result:
+        if not isinstance(node, ET._Element):
+            wrapped.append(node)
+            continue
+        if known is not None and node.get("ID") in known:
+            wrapped.append(known[node.get("ID")])
+            continue
+        wrapper = _WRAPPERS.get(ET.QName(node).localname)
+        wrapped.append(wrapper(node) if wrapper is not None else node)
+    return wrapped
+
+
 class OneNote():
-    def __init__(self, version=14):
-        self.process = ONProcess(version=version)
+    def __init__(self, version=14, backend=None, include=None, exclude=None,
+                 skip_recycle_bin=False, max_depth=None, timeout=None, timeouts=None, retries=0,
+                 backend_factory=None):
+        """
+          backend, timeout, timeouts, retries, backend_factory - see ONProcess.
+          include / exclude - names, nicknames or IDs of the notebooks to load / leave out.
+            Only the wanted notebooks are requested from OneNote.
+          skip_recycle_bin - leave the recycle bins out of the loaded hierarchy.
+          max_depth - 1 loads notebooks only, 2 down to sections, 3 (default) down to pages.
+        """
+        self.process = ONProcess(version=version, backend=backend, timeout=timeout,
+                                 timeouts=timeouts, retries=retries,
+                                 backend_factory=backend_factory)
         global namespace
         namespace = self.process.namespace
-        self.object_tree = ET.fromstring(self.process.get_hierarchy("",4))
+        self.include = _name_set(include)
+        self.exclude = _name_set(exclude)
+        self.skip_recycle_bin = skip_recycle_bin
+        self.max_depth = max_depth
+        self.find_cache_ttl = 30
+        self.refresh()
+
+    def refresh(self):
+        """Reload the hierarchy and drop everything derived from it"""
+        version = self.process.hierarchy_version
+        scope = 4 if self.max_depth is None else min(max(self.max_depth, 1), 3) + 1
+        if self.include is None and self.exclude is None:
+            self.object_tree = self._parse_hierarchy("", scope)
+        else:
+            self.object_tree = self._parse_hierarchy("", 2)
+            for notebook in list(self.object_tree):
+                if not self._wanted(notebook):
+                    self.object_tree.remove(notebook)
+                elif scope > 2:
+                    self.object_tree.replace(notebook, self._parse_hierarchy(notebook.get("ID"), scope))
         self.hierarchy = Hierarchy(self.object_tree)
-        
+        self._hierarchy_version = version
+        self._nodes_by_id = None
+        self._find_cache = {}
+
     def get_page_content(self, page_id, page_info=0):
         page_content_xml = ET.fromstring(self.process.get_page_content(page_id, page_info))
         return PageContent(page_content_xml)
 
+    def find_pages(self, query, scope=""):
+        """Iterate over the pages matching query, as PageHit objects.
+
+        scope is a hierarchy node or ID to search below (everything by
+        default). Hits are yielded while the result is still being parsed.
+        The result is cached for find_cache_ttl seconds, so stopping early
+        (autocomplete taking the first hits) still saves the next search.
+
+        The cache is dropped by refresh() and by hierarchy changes made
+        through this object's process. Changes made elsewhere (another
+        ONProcess or PageEditor, the OneNote UI) are only seen once the
+        cached result expires. After a change through this process, hits
+        are no longer linked to loaded pages (hit.page is None) until
+        refresh() reloads the hierarchy.
+        """
+        key = (getattr(scope, "id", scope), query)
+        cached = self._find_cache.get(key)
+        if (cached is None or cached[1] != self.process.hierarchy_version
+                or time.time() - cached[0] >= self.find_cache_ttl):
+            stamp = time.time()
+            version = self.process.hierarchy_version
+            cached = (stamp, version, self.process.find_pages(key[0], key[1], False) or "")
+            self._find_cache[key] = cached
+        return self._iter_page_hits(cached[2])
+
+    def pages(self):
+        """Iterate over every loaded page, recycle bins excluded"""
+        stack = list(reversed(self.hierarchy))
+        while stack:
+            node = stack.pop()
+            if isinstance(node, Page):
+                yield node
+            else:
+                stack.extend(reversed(node))
+
+    def query(self, expression, **variables):
+        """Run an XPath expression over the hierarchy.
+
+        Elements are matched with the "one" prefix, keyword arguments are
+        available as XPath variables:
+
+            on.query("//one:Page[@name = $name]", name="Todo")
+
+        Matching elements are returned as the already loaded hierarchy
+        objects, other results (strings, numbers) as they are.
+        """
+        return _run_query(self.object_tree, expression, variables, self._node_index())
+
+    def pages_modified_since(self, since):
+        """Pages modified after since, a datetime (naive ones are UTC) or an ISO string in UTC"""
+        return self.query("//one:Page[{} > $since]".format(XPATH_TIME.format("@lastModifiedTime")),
+                          since=_xpath_time(since))
+
+    def pages_named(self, text):
+        """Pages whose name contains text"""
+        return self.query("//one:Page[contains(@name, $text)]", text=text)
+
+    def _iter_page_hits(self, xml, chunk_size=1 << 16):
+        if not xml:
+            return
+        section_tag = namespace + "Section"
+        page_tag = namespace + "Page"
+        # the loaded pages may be stale once the hierarchy changed
+        nodes = self._node_index() if self._hierarchy_version == self.process.hierarchy_version else {}
+        parser = ET.XMLPullParser(events=("start", "end"))
+        section_id = ""
+        for offset in range(0, len(xml), chunk_size):
+            parser.feed(xml[offset:offset + chunk_size])
+            for event, node in parser.read_events():
+                if event == "start":
+                    if node.tag == section_tag:
+                        section_id = node.get("ID")
+                elif node.tag == page_tag:
+                    yield PageHit(node, section_id, nodes.get(node.get("ID")))
+                    node.clear()
+        parser.close()
+
+    def _parse_hierarchy(self, start_node_id, scope):
+        tree = ET.fromstring(self.process.get_hierarchy(start_node_id, scope))
+        if self.skip_recycle_bin:
+            for group in tree.findall(".//{}SectionGroup[@isRecycleBin]".format(namespace)):
+                group.getparent().remove(group)
+        return tree
+
+    def _wanted(self, notebook):
+        keys = {notebook.get("name"), notebook.get("nickname"), notebook.get("ID")}
+        if self.include is not None and not keys & self.include:
+            return False
+        return self.exclude is None or not keys & self.exclude
+
+    def _node_index(self):
+        """Map the ID of every loaded hierarchy node to its object"""
+        if self._nodes_by_id is None:
+            index = {}
+            stack = list(self.hierarchy)
+            while stack:
+                node = stack.pop()
+                index[node.id] = node
+                if isinstance(node, Page):
+                    continue
+                stack.extend(node)
+                if getattr(node, "recycleBin", None) is not None:
+                    stack.append(node.recycleBin)
+            self._nodes_by_id = index
+        return self._nodes_by_id
+
 class PageEditor():
-    def __init__(self, version=14):
-        self._process = ONProcess(version=version)
+    def __init__(self, version=14, backend=None, timeout=None, timeouts=None, retries=0,
+                 backend_factory=None):
+        self._process = ONProcess(version=version, backend=backend, timeout=timeout,
+                                  timeouts=timeouts, retries=retries,
+                                  backend_factory=backend_factory)
         self._namespace = self._process.namespace
         self._page = None
         #ET.register_namespace("one", self._namespace)
         self._xml = None
         self._title = None
         self._flat_contents = []
+        # set when the page changed behind the flat view, see _fresh
+        self._stale = False
 
     def create(self, section, title, lines=None):
         now = time.time()
@@ -48,6 +271,7 @@ class PageEditor():
             self.add_lines(lines)
 
     def find_in_xml(self, patterns):
+        self._fresh()
         xml = self._rawxml
         found = []
         if not isinstance(patterns, (list, tuple)):
@@ -62,6 +286,7 @@ class PageEditor():
     def replace_in_xml(self, originals, replacements, dry_run=True, confirm=True):
         skipped = []
         applied = []
+        self._fresh()
         xml = self._rawxml
         for orig, rep in zip(originals, replacements):
             if confirm:
@@ -106,6 +331,61 @@ class PageEditor():
                 
         self._flatten()
 
+    def append_lines(self, lines, outline_id=None, chunk_size=500, refresh=False):
+        """Append lines to an existing Outline without rewriting the page.
+
+        Only that Outline is sent to OneNote, in update documents adding at
+        most chunk_size lines, so lines can be any iterable (a generator, an
+        open log file...). The outline defaults to the last one on the page.
+
+        OneNote takes the OEChildren of an Outline addressed by objectID as
+        its whole new content, so every update lists the OEs already in the
+        outline (with their objectIDs) before the new ones, and the page is
+        fetched again between chunks to learn the IDs given to the new OEs.
+        The flat view of the page is refreshed right away if asked to,
+        otherwise before it is next read or edited.
+        """
+        self._fresh()
+        if outline_id is None:
+            outline_id = self._last_outline_id()
+        chunk = []
+        for line in lines:
+            chunk.append(line)
+            if len(chunk) >= chunk_size:
+                self._send_lines(outline_id, chunk)
+                chunk = []
+        if chunk:
+            self._send_lines(outline_id, chunk)
+
+        if refresh:
+            self._fresh()
+
+    def _last_outline_id(self):
+        outlines = self._xml.findall(self._namespace + "Outline")
+        if not outlines:
+            raise Exception("Page {} has no Outline to append to".format(self._page.name))
+        return outlines[-1].get("objectID")
+
+    def _send_lines(self, outline_id, lines):
+        one = self._namespace
+        self._fresh()
+        current = self._xml.find("{}Outline[@objectID='{}']".format(one, outline_id))
+        if current is None:
+            raise Exception("Page {} has no Outline {}".format(self._page.name, outline_id))
+        page = ET.Element(one + "Page", nsmap={"one": one.strip("{}")})
+        page.set("ID", self._page.id)
+        outline = ET.SubElement(page, one + "Outline")
+        outline.set("objectID", outline_id)
+        children = ET.SubElement(outline, one + "OEChildren")
+        existing = current.find(one + "OEChildren")
+        if existing is not None:
+            children.extend(list(existing.iterchildren(one + "OE")))
+        for line in lines:
+            ET.SubElement(ET.SubElement(children, one + "OE"), one + "T").text = ET.CDATA(line)
+        self._process.update_page_content(b'<?xml version="1.0"?>\n' + ET.tostring(page))
+        # the OEs were moved out of _xml, and the new ones have no ID yet
+        self._stale = True
+
     def open(self, page):
         self._page = page
         self._flatten()
@@ -114,6 +394,7 @@ class PageEditor():
         """Expose each line without the xml nesting"""
         self._rawxml = self._process.get_page_content(self._page.id)
         self._xml = ET.fromstring(self._rawxml)
+        self._stale = False
         flat = list(self._xml.iter(self._namespace+'T'))
         try:
             self._title = flat[0]
@@ -122,27 +403,36 @@ class PageEditor():
             self._title=''
             self._flat_contents = []
 
+    def _fresh(self):
+        """Fetch the page again if lines were appended since it was flattened"""
+        if self._stale:
+            self._flatten()
+
     def _push(self):
         self._process.update_page_content(b'<?xml version="1.0"?>\n' + ET.tostring(self._xml))
         #refresh
         self._flatten()        
 
     def print(self):
+        self._fresh()
         print("Title: {}".format(self._title.text))
         print("\n".join(node.text if node.text else "" for node in self._flat_contents))
 
     def get_lines(self, start=0, end=None):
+        self._fresh()
         if end is None:
             end = len(self._flat_contents)
             
         return [node.text if node.text else "" for node in self._flat_contents[start:end]]
 
     def update_title(self, newtitle):
+        self._fresh()
         self._title.text = newtitle
         self._push()
 
     def update_lines(self, lines, start=0):
         """Modify the content of lines[start:end]""" 
+        self._fresh()
         for xml_line, newline in zip(self._flat_contents[start:], lines):
             xml_line.text = newline
         
@@ -151,6 +441,7 @@ class PageEditor():
     def format_lines(self, linenumbers, key, value):
         if not isinstance(linenumbers, list):
             linenumbers=[linenumbers]
+        self._fresh()
         for n in linenumbers:
             self._flat_contents[n].set(key, value)
             
@@ -320,6 +611,30 @@ class Page(Node):
         self._children = [Meta(xml=node) for node in xml]
 
 
+class PageHit():
+    """A search result, linked to the loaded Page with the same ID if any"""
+
+    def __init__ (self, xml=None, section_id="", page=None):
+        self.name = ""
+        self.id = ""
+        self.last_modified_time = ""
+        self.section_id = section_id
+        self.page = page
+        if (xml != None):
+            self.__deserialize_from_xml(xml)
+
+    def __str__(self):
+        return self.name if self.name else "NO_NAME"
+
+    def __repr__(self):
+        return object.__repr__(self).rstrip(">") + " " + str(self.name) + ">"
+
+    def __deserialize_from_xml(self, xml):
+        self.name = xml.get("name")
+        self.id = xml.get("ID")
+        self.last_modified_time = xml.get("lastModifiedTime")
+
+
 class Meta():
     
     def __init__ (self, xml = None):
@@ -348,6 +663,8 @@ class PageContent(Node):
         self.lang = ""
         self.is_currently_viewed = ""
         self.files = []
+        self.media_playlist = None
+        self.tag_defs = {}
         if (xml != None):
             self.__deserialize_from_xml(xml)
             self._xml = xml
@@ -375,6 +692,21 @@ class PageContent(Node):
                     self._children.append(Title(node))    
                 elif (node.tag == namespace + "MediaPlaylist"):
                     self.media_playlist = MediaPlaylist(node, self)       
+                elif (node.tag == namespace + "TagDef"):
+                    tag_def = TagDef(node)
+                    self.tag_defs[tag_def.index] = tag_def
+
+    def query(self, expression, **variables):
+        """Run an XPath expression over the page, see OneNote.query"""
+        return _run_query(self._xml, expression, variables)
+
+    def oes_containing(self, text):
+        """OEs whose own text contains text"""
+        return self.query("//one:OE[contains(one:T, $text)]", text=text)
+
+    def timeline(self):
+        """MediaTimeline of the notes taken while recording audio/video"""
+        return MediaTimeline(self)
     
 
 class Title(Node):
@@ -474,6 +806,8 @@ class OE(Node):
         self.parent = parent_node
         self.files = []
         self.media_indices = []
+        self.tags = []
+        self.table = None
         if (xml != None):
             self.__deserialize_from_xml(xml)
             self._xml = xml
@@ -520,6 +854,177 @@ class OE(Node):
             elif (node.tag == namespace + "MediaIndex"):
                 self.media_indices.append(MediaIndex(node, self))
 
+            elif (node.tag == namespace + "Table"):
+                self.table = Table(node, self)
+
+            elif (node.tag == namespace + "Tag"):
+                self.tags.append(Tag(node, self))
+
+
+class Table(Node):
+    """A one:Table. Rows are only built when accessed, to_columns reads the XML directly"""
+
+    def __init__ (self, xml=None, parent_node=None):
+        super().__init__()
+        self.id = ""
+        self.last_modified_time = ""
+        self.borders_visible = ""
+        self.has_header_row = ""
+        self.column_widths = []
+        self.parent = parent_node
+        self._rows = None
+        if (xml != None):
+            self.__deserialize_from_xml(xml)
+            self._xml = xml
+
+    def __str__(self):
+        return "Table"
+
+    def __getitem__(self, key):
+        return self.rows[key]
+
+    def __iter__(self):
+        yield from self.rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def rows(self):
+        if self._rows is None:
+            self._rows = [Row(node, self) for node in self._xml.iterchildren(namespace + "Row")]
+        return self._rows
+
+    def __deserialize_from_xml(self, xml):
+        self.id = xml.get("objectID")
+        self.last_modified_time = xml.get("lastModifiedTime")
+        self.borders_visible = xml.get("bordersVisible")
+        self.has_header_row = xml.get("hasHeaderRow")
+        for columns in xml.iterchildren(namespace + "Columns"):
+            self.column_widths = [float(c.get("width") or 0)
+                                  for c in columns.iterchildren(namespace + "Column")]
+
+    def to_columns(self, skip_rows=0, infer_types=False):
+        """The plain text of the cells, as one list per column.
+
+        Reads the rows straight from the XML, skipping the first skip_rows
+        (e.g. 1 for a header row). With infer_types each column becomes a
+        NumPy array of int64, float64, bool or str; empty cells are left out
+        when inferring the type, and masked (numpy.ma) unless it is str.
+        """
+        row_tag, cell_tag, t_tag = namespace + "Row", namespace + "Cell", namespace + "T"
+        columns = [[] for _ in self.column_widths]
+        count = 0
+        for row in itertools.islice(self._xml.iterchildren(row_tag), skip_rows, None):
+            width = 0
+            for width, cell in enumerate(row.iterchildren(cell_tag), 1):
+                if width > len(columns):
+                    columns.append([""] * count)
+                columns[width - 1].append(_plain_text("\n".join(t.text or "" for t in cell.iter(t_tag))))
+            for column in columns[width:]:
+                column.append("")
+            count += 1
+        if infer_types:
+            return [_infer_column(column) for column in columns]
+        return columns
+
+
+class Row(Node):
+
+    def __init__ (self, xml=None, parent_node=None):
+        super().__init__()
+        self.id = ""
+        self.last_modified_time = ""
+        self.parent = parent_node
+        if (xml != None):
+            self.__deserialize_from_xml(xml)
+            self._xml = xml
+
+    def __str__(self):
+        return "Row"
+
+    def __deserialize_from_xml(self, xml):
+        self.id = xml.get("objectID")
+        self.last_modified_time = xml.get("lastModifiedTime")
+        self._children = [Cell(node, self) for node in xml.iterchildren(namespace + "Cell")]
+
+
+class Cell(Node):
+
+    def __init__ (self, xml=None, parent_node=None):
+        super().__init__()
+        self.id = ""
+        self.last_modified_time = ""
+        self.shading_color = ""
+        self.parent = parent_node
+        if (xml != None):
+            self.__deserialize_from_xml(xml)
+            self._xml = xml
+
+    def __str__(self):
+        return self.text
+
+    @property
+    def text(self):
+        """Plain text of the cell, one line per OE"""
+        return _plain_text("\n".join(t.text or "" for t in self._xml.iter(namespace + "T")))
+
+    def __deserialize_from_xml(self, xml):
+        self.id = xml.get("objectID")
+        self.last_modified_time = xml.get("lastModifiedTime")
+        self.shading_color = xml.get("shadingColor")
+        for node in xml.iterchildren(namespace + "OEChildren"):
+            for childNode in node.iterchildren(namespace + "OE"):
+                self._children.append(OE(childNode, self))
+
+
+class TagDef():
+    """The definition of the tags with a given index on a page"""
+
+    def __init__ (self, xml=None):
+        self.index = ""
+        self.type = ""
+        self.symbol = ""
+        self.font_color = ""
+        self.highlight_color = ""
+        self.name = ""
+        if (xml != None):
+            self.__deserialize_from_xml(xml)
+
+    def __str__(self):
+        return self.name
+
+    def __deserialize_from_xml(self, xml):
+        self.index = xml.get("index")
+        self.type = xml.get("type")
+        self.symbol = xml.get("symbol")
+        self.font_color = xml.get("fontColor")
+        self.highlight_color = xml.get("highlightColor")
+        self.name = xml.get("name")
+
+
+class Tag():
+
+    def __init__ (self, xml=None, parent_node=None):
+        self.index = ""
+        self.completed = False
+        self.disabled = False
+        self.creation_date = ""
+        self.completion_date = ""
+        self.parent = parent_node
+        if (xml != None):
+            self.__deserialize_from_xml(xml)
+
+    def __str__(self):
+        return "Tag " + str(self.index)
+
+    def __deserialize_from_xml(self, xml):
+        self.index = xml.get("index")
+        self.completed = xml.get("completed") == "true"
+        self.disabled = xml.get("disabled") == "true"
+        self.creation_date = xml.get("creationDate")
+        self.completion_date = xml.get("completionDate")
+
 
 class InsertedFile():
 
@@ -557,6 +1062,9 @@ class InsertedFile():
 class MediaReference():
     def __init__ (self, xml=None, parent_node=None):
         self.media_id = ""
+        self.parent = parent_node
+        if (xml != None):
+            self.__deserialize_from_xml(xml)
         
     def __iter__ (self):
         yield None
@@ -571,13 +1079,16 @@ class MediaReference():
 class MediaPlaylist():
     def __init__ (self, xml=None, parent_node=None):
         self.media_references = []
+        self.parent = parent_node
+        if (xml != None):
+            self.__deserialize_from_xml(xml)
         
     def __iter__(self):
         for c in self.media_references:
             yield c
     
     def __str__(self):
-        return "Media Index"
+        return "Media Playlist"
 
     def __deserialize_from_xml(self, xml):
         for node in xml:
@@ -589,6 +1100,9 @@ class MediaIndex():
     def __init__ (self, xml=None, parent_node=None):
         self.media_reference = None
         self.time_index = 0
+        self.parent = parent_node
+        if (xml != None):
+            self.__deserialize_from_xml(xml)
         
     def __iter__(self):
         yield None
@@ -602,11 +1116,69 @@ class MediaIndex():
             if (node.tag == namespace + "MediaReference"):
                 self.media_reference = MediaReference(node, self)
                 
+
+class MediaTimeline():
+    """The MediaIndex points of a page, sorted by time index.
+
+    Holds parallel lists of time indices (seconds into the recording),
+    OE objectIDs and media IDs, looked up with bisect.
+    """
+
+    def __init__ (self, page_content=None):
+        self.times = []
+        self.oe_ids = []
+        self.media_ids = []
+        self._by_oe = {}
+        if (page_content != None):
+            self.__build(page_content)
+
+    def __len__(self):
+        return len(self.times)
+
+    def __iter__(self):
+        yield from zip(self.times, self.oe_ids, self.media_ids)
+
+    def __getitem__(self, key):
+        return (self.times[key], self.oe_ids[key], self.media_ids[key])
+
+    def __build(self, page_content):
+        points = []
+        stack = list(page_content)
+        while stack:
+            node = stack.pop()
+            stack.extend(node)
+            for index in getattr(node, "media_indices", ()):
+                media_id = index.media_reference.media_id if index.media_reference else ""
+                points.append((float(index.time_index or 0), node.id, media_id))
+        points.sort()
+        for time_index, oe_id, media_id in points:
+            self.times.append(time_index)
+            self.oe_ids.append(oe_id)
+            self.media_ids.append(media_id)
+            self._by_oe.setdefault(oe_id, (time_index, media_id))
+
+    def note_at(self, seconds):
+        """(time index, OE objectID, media ID) of the last note taken at or before seconds"""
+        i = bisect.bisect_right(self.times, seconds) - 1
+        return self[i] if i >= 0 else None
+
+    def notes_between(self, start, end):
+        """Points with start <= time index < end"""
+        lo = bisect.bisect_left(self.times, start)
+        hi = bisect.bisect_left(self.times, end)
+        return [self[i] for i in range(lo, hi)]
+
+    def offset_of(self, oe_id):
+        """(time index, media ID) at which the OE was written, None if not indexed"""
+        return self._by_oe.get(oe_id)
+
   
 class MediaFile(InsertedFile):
     def __init__ (self, xml=None, parent_node=None):
         self.media_reference = None
         super().__init__(xml, parent_node)
+        if (xml != None):
+            self.__deserialize_from_xml(xml)
         
     def __iter__(self):
         yield None
@@ -618,7 +1190,7 @@ class MediaFile(InsertedFile):
             return "Unnamed Media File"
             
     def __deserialize_from_xml(self, xml):
-        super().__deserialize_from_xml(xml)
+        # the InsertedFile attributes are read by InsertedFile.__init__
         for node in xml:
             if (node.tag == namespace + "MediaReference"):
                 self.media_reference = MediaReference(node, self)
@@ -699,3 +1271,25 @@ class Image():
                 if (node.text != None):
                     self.data = node.text
                 
+
+
+_WRAPPERS = {
+    "Notebook": Notebook,
+    "SectionGroup": SectionGroup,
+    "Section": Section,
+    "Page": Page,
+    "Meta": Meta,
+    "Title": Title,
+    "Outline": Outline,
+    "OE": OE,
+    "Image": Image,
+    "Ink": Ink,
+    "InkWord": Ink,
+    "InsertedFile": InsertedFile,
+    "MediaFile": MediaFile,
+    "Table": Table,
+    "Tag": Tag,
+    "TagDef": TagDef,
+    "Row": Row,
+    "Cell": Cell,
+}
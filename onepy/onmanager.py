@@ -1,9 +1,15 @@
-import win32com.client
-import pywintypes
+try:
+    import win32com.client
+    import pywintypes
+except ImportError:
+    # no COM on this platform, only recorded sessions can be replayed
+    win32com = None
 import datetime
 import pytz
 
-if win32com.client.gencache.is_readonly == True:
+from .supervisor import CallSupervisor, ONTimeoutError
+
+if win32com is not None and win32com.client.gencache.is_readonly == True:
     win32com.client.gencache.is_readonly = False
     win32com.client.gencache.Rebuild()
 
@@ -20,20 +26,47 @@ ON14_SCHEMA = "{http://schemas.microsoft.com/office/onenote/2010/onenote}"
 
 class ONProcess():
 
-    def __init__(self, version=15):
-
-        try: 
-            if (version == 15):
-                self.process = win32com.client.gencache.EnsureDispatch(ON15_APP_ID)
-                self.namespace = ON15_SCHEMA
-            elif (version == 14):
-                self.process = win32com.client.gencache.EnsureDispatch(ON14_APP_ID)
-                self.namespace = ON14_SCHEMA
-            else:
-                raise Exception("Invalid OneNote version: {}".format(version))
-        except Exception:
-            raise
+    def __init__(self, version=15, backend=None, timeout=None, timeouts=None, retries=0,
+                 backend_factory=None):
+        """
+          backend replaces the OneNote COM object, e.g. a RecordingBackend
+          wrapping it or a ReplayBackend serving a recorded session.
+
+          timeout (seconds, for every call) and timeouts (per COM method,
+          e.g. {"Publish": 600}) run the calls on a supervised worker thread:
+          a call past its deadline raises ONTimeoutError and the worker is
+          replaced by a new one made with backend_factory (by default a new
+          COM object). Calls rejected while OneNote is busy are retried up
+          to retries times. The backend is created on the worker thread, as
+          a COM object can't be called from another apartment, so
+          supervising a given backend requires backend_factory instead.
+        """
+        if (version == 15):
+            app_id, self.namespace = ON15_APP_ID, ON15_SCHEMA
+        elif (version == 14):
+            app_id, self.namespace = ON14_APP_ID, ON14_SCHEMA
+        else:
+            raise Exception("Invalid OneNote version: {}".format(version))
+
+        if timeout is not None or timeouts or retries:
+            if backend is not None:
+                raise Exception("Supervised calls need backend_factory, not backend")
+            if backend_factory is None:
+                backend_factory = lambda: self._dispatch(app_id)
+            backend = CallSupervisor(backend_factory, timeout, timeouts, retries)
+        elif backend is None:
+            backend = self._dispatch(app_id)
+        self.process = backend
+        # bumped by every call that changes the hierarchy, so callers can
+        # tell when hierarchy-derived caches went stale
+        self.hierarchy_version = 0
     
+    @staticmethod
+    def _dispatch(app_id):
+        if win32com is None:
+            raise Exception("pywin32 is required to start OneNote")
+        return win32com.client.gencache.EnsureDispatch(app_id)
+
     @staticmethod        
     def default_date():
         #see http://stackoverflow.com/questions/34904094/how-to-debug-win32com-call-in-python
@@ -52,7 +85,10 @@ class ONProcess():
 
     def update_hierarchy(self, changes_xml_in):
         try:
+            self.hierarchy_version += 1
             self.process.UpdateHierarchy(changes_xml_in)
+        except ONTimeoutError:
+            raise
         except Exception as e: 
             print("Could not Update Hierarchy: {}".format(e))
 
@@ -65,14 +101,20 @@ class ONProcess():
           3 - Creates a section with the specified name at the specified location.
         """
         try:
+            self.hierarchy_version += 1
             return(self.process.OpenHierarchy(path, relative_to_object_id, "", create_file_type))
+        except ONTimeoutError:
+            raise
         except Exception as e: 
             print("Could not Open Hierarchy: {}".format(e))
 
 
     def delete_hierarchy (self, object_id, excpect_last_modified=""):
         try:
+            self.hierarchy_version += 1
             self.process.DeleteHierarchy(object_id, excpect_last_modified)
+        except ONTimeoutError:
+            raise
         except Exception as e: 
             print("Could not Delete Hierarchy: {}".format(e))
 
@@ -84,13 +126,19 @@ class ONProcess():
           2 - Createa blank page that has no title
         """
         try:
+            self.hierarchy_version += 1
             self.process.CreateNewPage(section_id, "", new_page_style)
+        except ONTimeoutError:
+            raise
         except Exception as e: 
             print("Unable to create the page: {}".format(e))
             
     def close_notebook(self, notebook_id):
         try:
+            self.hierarchy_version += 1
             self.process.CloseNotebook(notebook_id)
+        except ONTimeoutError:
+            raise
         except Exception as e: 
             print("Could not Close Notebook: {}".format(e))
 
@@ -129,6 +177,8 @@ class ONProcess():
             expect_last_modified = self.default_date()
         try:
             self.process.DeletePageContent(page_id, object_id, expect_last_modified)
+        except ONTimeoutError:
+            raise
         except Exception as e: 
             print("Could not Delete Page Content: {}".format(e))
 
@@ -139,6 +189,8 @@ class ONProcess():
     def navigate_to(self, object_id, new_window=False):
         try:
             self.process.NavigateTo(object_id, "", new_window)
+        except ONTimeoutError:
+            raise
         except Exception as e: 
             print("Could not Navigate To")
 
@@ -155,24 +207,32 @@ class ONProcess():
         """
         try:
             self.process.Publish(hierarchy_id, target_file_path, publish_format, clsid_of_exporter)
+        except ONTimeoutError:
+            raise
         except Exception as e: 
             print("Could not Publish: {}".format(e))
 
     def open_package(self, path_package, path_dest):
         try:
             return(self.process.OpenPackage(path_package, path_dest))
+        except ONTimeoutError:
+            raise
         except Exception as e: 
             print("Could not Open Package: {}".format(e))
 
     def get_hyperlink_to_object(self, hierarchy_id, target_file_path=""):
         try:
             return(self.process.GetHyperlinkToObject(hierarchy_id, target_file_path))
+        except ONTimeoutError:
+            raise
         except Exception as e: 
             print("Could not Get Hyperlink: {}".format(e))
 
     def find_pages(self, start_node_id, search_string, display):
         try:
             return(self.process.FindPages(start_node_id, search_string, "", False, display))
+        except ONTimeoutError:
+            raise
         except Exception as e: 
             print("Could not Find Pages: {}".format(e))
 
@@ -185,6 +245,8 @@ class ONProcess():
         """
         try:
             return(self.process.GetSpecialLocation(special_location))
+        except ONTimeoutError:
+            raise
         except Exception as e: 
             print("Could not retrieve special location: {}".format(e))
     
\ No newline at end of file
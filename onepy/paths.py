@@ -0,0 +1,28 @@
+"""
+  Paths
+  File and folder names for the pages and files written to disk
+"""
+
+import os
+import re
+
+__all__ = ["safe_name", "page_path"]
+
+
+def safe_name(name):
+    """name with the characters not allowed in file names replaced"""
+    return re.sub(r'[<>:"/\\|?*\x00-\x1f]', "_", name).strip(" .") or "_"
+
+
+def page_path(page, used, suffix=""):
+    """notebook/section groups/section/page, with the page ID if already used"""
+    parts = []
+    node = getattr(page, "parent", None)
+    while node is not None:
+        parts.append(safe_name(node.name or node.id))
+        node = getattr(node, "parent", None)
+    folder = os.path.join(*reversed(parts)) if parts else ""
+    path = os.path.join(folder, safe_name(page.name or page.id) + suffix)
+    if path in used:
+        path = os.path.join(folder, safe_name("{} {}".format(page.name, page.id)) + suffix)
+    return path
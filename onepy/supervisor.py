@@ -0,0 +1,175 @@
+"""
+  Supervisor
+  Runs OneNote calls on a worker thread with per-call deadlines, so a
+  call blocked by a sync or a modal dialog can't hang the caller
+"""
+
+import queue
+import random
+import threading
+import time
+
+try:
+    import pythoncom
+except ImportError:
+    pythoncom = None
+
+__all__ = ["CallSupervisor", "ONTimeoutError"]
+
+# RPC_E_CALL_REJECTED, RPC_E_SERVERCALL_RETRYLATER: OneNote is busy, try again later
+BUSY_HRESULTS = (-2147418111, -2147417846)
+
+
+class ONTimeoutError(Exception):
+    """A OneNote call did not return before its deadline"""
+
+
+def is_busy(error):
+    hresult = getattr(error, "hresult", None)
+    if hresult is None and error.args and isinstance(error.args[0], int):
+        hresult = error.args[0]
+    return hresult in BUSY_HRESULTS
+
+
+class _Job():
+
+    def __init__(self, method, args):
+        self.method = method
+        self.args = args
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+        # the worker the job is queued on, it moves when a worker is recycled
+        self.worker = None
+        # set under the supervisor lock: a cancelled job is never started
+        self.started = False
+        self.cancelled = False
+
+
+class _Worker(threading.Thread):
+    """Owns a backend created by factory in its own (COM) apartment"""
+
+    def __init__(self, supervisor):
+        super().__init__(name="onepy-com-worker", daemon=True)
+        self.supervisor = supervisor
+        self.jobs = queue.Queue()
+        self.abandoned = False
+
+    def run(self):
+        if pythoncom is not None:
+            pythoncom.CoInitialize()
+        try:
+            try:
+                backend = self.supervisor._factory()
+            except Exception as e:
+                backend, error = None, e
+            while True:
+                job = self.jobs.get()
+                if job is None:
+                    return
+                if self.abandoned:
+                    self.supervisor._submit(job)
+                    continue
+                with self.supervisor._lock:
+                    if job.cancelled:
+                        continue
+                    job.started = True
+                try:
+                    if backend is None:
+                        raise error
+                    job.result = getattr(backend, job.method)(*job.args)
+                except Exception as e:
+                    job.error = e
+                job.done.set()
+        finally:
+            if pythoncom is not None:
+                pythoncom.CoUninitialize()
+
+    def abandon(self):
+        """Stop taking jobs, return the ones still waiting"""
+        self.abandoned = True
+        pending = []
+        while True:
+            try:
+                job = self.jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                pending.append(job)
+        self.jobs.put(None)
+        return pending
+
+
+class CallSupervisor():
+    """Stands in for the OneNote COM object and supervises every call.
+
+    factory creates the backend (normally the COM object) and is called
+    on the worker thread. A call still running at its deadline raises
+    ONTimeoutError; the stuck worker is then abandoned and the next call
+    starts a fresh one. A call still queued at its deadline raises
+    ONTimeoutError too, and is dropped without ever running. Calls rejected because OneNote is busy are retried
+    up to retries times with jittered exponential backoff.
+    """
+
+    def __init__(self, factory, timeout=None, timeouts=None, retries=0, backoff=0.5):
+        self._factory = factory
+        self.timeout = timeout
+        self.timeouts = dict(timeouts or {})
+        self.retries = retries
+        self.backoff = backoff
+        self.recycled = 0
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def call(*args):
+            return self.call(name, args)
+
+        return call
+
+    def call(self, method, args):
+        for attempt in range(self.retries + 1):
+            try:
+                return self._call_once(method, args)
+            except ONTimeoutError:
+                raise
+            except Exception as e:
+                if attempt == self.retries or not is_busy(e):
+                    raise
+            time.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+
+    def _call_once(self, method, args):
+        job = _Job(method, args)
+        self._submit(job)
+        timeout = self.timeouts.get(method, self.timeout)
+        if not job.done.wait(timeout):
+            with self._lock:
+                job.cancelled = not job.started
+            # a job still queued is dropped, only a worker stuck on it is replaced
+            if not job.cancelled:
+                self._recycle(job.worker)
+            raise ONTimeoutError("{} did not return within {}s".format(method, timeout))
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    def _submit(self, job):
+        with self._lock:
+            if self._worker is None:
+                self._worker = _Worker(self)
+                self._worker.start()
+            job.worker = self._worker
+            self._worker.jobs.put(job)
+
+    def _recycle(self, worker):
+        with self._lock:
+            if self._worker is not worker:
+                return
+            self._worker = None
+            self.recycled += 1
+        for job in worker.abandon():
+            if not job.cancelled:
+                self._submit(job)
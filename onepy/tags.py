@@ -0,0 +1,125 @@
+"""
+  Tags
+  An index of the tagged OEs (to-dos, important, questions...) of all pages
+"""
+
+from collections import namedtuple
+import json
+import os
+
+from .onepy import _plain_text
+
+__all__ = ["TagIndex", "TagEntry"]
+
+# type of the built-in To Do tag in TagDef
+TODO_TYPE = 0
+
+TagEntry = namedtuple("TagEntry", "tag_type tag_name completed page_id object_id text")
+
+
+class TagIndex():
+    """Tagged OEs of every page, kept up to date incrementally.
+
+    update() only fetches the pages whose lastModifiedTime changed since
+    they were indexed. With a path, the index is loaded from and saved to
+    that JSON file, so later runs start from the previous state:
+
+        index = TagIndex("tags.json")
+        index.update(on)
+        open_todos = index.todos()
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._pages = {}
+        self._by_key = None
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def __len__(self):
+        return sum(len(entries) for _, entries in self._pages.values())
+
+    def __iter__(self):
+        for _, entries in self._pages.values():
+            yield from entries
+
+    def update(self, onenote, pages=None):
+        """Index new and changed pages, returns how many were fetched.
+
+        When pages is None every page of onenote is considered, and pages
+        that no longer exist are dropped from the index.
+        """
+        full_scan = pages is None
+        if full_scan:
+            pages = onenote.pages()
+        seen = set()
+        fetched = 0
+        for page in pages:
+            seen.add(page.id)
+            known = self._pages.get(page.id)
+            if known is not None and known[0] == page.last_modified_time:
+                continue
+            content = onenote.get_page_content(page.id)
+            self._pages[page.id] = (page.last_modified_time, _page_entries(content, page.id))
+            fetched += 1
+        if full_scan:
+            for page_id in set(self._pages) - seen:
+                del self._pages[page_id]
+        self._by_key = None
+        if self.path is not None:
+            self.save()
+        return fetched
+
+    def find(self, tag_type=None, completed=None, name=None):
+        """Entries matching every criterion that is not None"""
+        if tag_type is not None and completed is not None:
+            entries = self._index().get((tag_type, completed), [])
+        elif tag_type is not None:
+            entries = self._index().get((tag_type, True), []) + self._index().get((tag_type, False), [])
+        else:
+            entries = list(self)
+            if completed is not None:
+                entries = [e for e in entries if e.completed == completed]
+        if name is not None:
+            entries = [e for e in entries if e.tag_name == name]
+        return entries
+
+    def todos(self, completed=False):
+        """To-do items, the open ones by default"""
+        return self.find(TODO_TYPE, completed)
+
+    def _index(self):
+        if self._by_key is None:
+            self._by_key = {}
+            for entry in self:
+                self._by_key.setdefault((entry.tag_type, entry.completed), []).append(entry)
+        return self._by_key
+
+    def load(self):
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        self._pages = {page_id: (time, [TagEntry(*e) for e in entries])
+                       for page_id, (time, entries) in data.items()}
+        self._by_key = None
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._pages, f)
+        os.replace(tmp, self.path)
+
+
+def _page_entries(content, page_id):
+    entries = []
+    stack = list(reversed(content))
+    while stack:
+        node = stack.pop()
+        stack.extend(reversed(node))
+        if getattr(node, "table", None) is not None:
+            stack.extend(reversed([cell for row in node.table for cell in row]))
+        for tag in getattr(node, "tags", ()):
+            tag_def = content.tag_defs.get(tag.index)
+            tag_type = int(tag_def.type) if tag_def is not None and tag_def.type else None
+            entries.append(TagEntry(tag_type, tag_def.name if tag_def is not None else None,
+                                    tag.completed, page_id, node.id, _plain_text(node.text)))
+    return entries
@@ -0,0 +1,101 @@
+"""
+A fake OneNote COM object for the tests that run without OneNote
+"""
+
+import lxml.etree as ET
+
+NS = "http://schemas.microsoft.com/office/onenote/2013/onenote"
+MODIFIED = "2016-01-20T10:11:12.000Z"
+
+
+def notebooks(body):
+    """A GetHierarchy answer holding body"""
+    return '<?xml version="1.0"?>\n<one:Notebooks xmlns:one="{}">{}</one:Notebooks>'.format(NS, body)
+
+
+def page_entry(page_id, name=None, modified=MODIFIED):
+    return '<one:Page ID="{}" name="{}" lastModifiedTime="{}"/>'.format(page_id, name or page_id, modified)
+
+
+class FakeOneNote():
+    """Answers like OneNote for the pages {page ID: XML inside one:Page}.
+
+    The hierarchy is a notebook "N" with a section "S" holding every page,
+    unless a GetHierarchy answer is given. Calls are kept in calls.
+    """
+
+    def __init__(self, pages=None, hierarchy=None):
+        self.pages = dict(pages or {})
+        self.hierarchy = hierarchy
+        self.modified = {page_id: MODIFIED for page_id in self.pages}
+        self.calls = []
+        self.updates = []
+
+    def called(self, method):
+        """Arguments of every call to method"""
+        return [args for name, args in self.calls if name == method]
+
+    def hierarchy_xml(self):
+        if self.hierarchy is not None:
+            return self.hierarchy
+        entries = "".join(page_entry(p, modified=self.modified[p]) for p in sorted(self.modified))
+        return notebooks('<one:Notebook name="N" nickname="N" ID="{{N1}}">'
+                         '<one:Section name="S" ID="{{S1}}">{}</one:Section></one:Notebook>'.format(entries))
+
+    def GetHierarchy(self, start_node_id, scope):
+        self.calls.append(("GetHierarchy", (start_node_id, scope)))
+        xml = self.hierarchy_xml()
+        if not start_node_id:
+            return xml
+        for node in ET.fromstring(xml).iter():
+            if node.get("ID") == start_node_id:
+                return ET.tostring(node, encoding="unicode")
+        raise Exception("Object not found")
+
+    def GetPageContent(self, page_id, ignored, page_info):
+        self.calls.append(("GetPageContent", (page_id, page_info)))
+        if page_id not in self.pages:
+            raise Exception("Object not found")
+        return '<?xml version="1.0"?>\n<one:Page xmlns:one="{}" ID="{}" name="{}">{}</one:Page>'.format(
+            NS, page_id, page_id, self.pages[page_id])
+
+    def UpdatePageContent(self, xml, expect_last_modified):
+        """Replaces the objects sent, by objectID (by tag for the Title), like OneNote"""
+        self.calls.append(("UpdatePageContent", (xml,)))
+        self.updates.append(xml)
+        update = ET.fromstring(xml)
+        if update.get("ID") not in self.pages:
+            return
+        page = ET.fromstring(self.GetPageContent(update.get("ID"), "", 0).encode("utf-8"))
+        self.calls.pop()
+        for node in update:
+            for oe in node.iter("{%s}OE" % NS):
+                if oe.get("objectID") is None:
+                    self.new_ids = getattr(self, "new_ids", 0) + 1
+                    oe.set("objectID", "{{new-{}}}".format(self.new_ids))
+            if node.get("objectID") is not None:
+                old = page.find("*[@objectID='{}']".format(node.get("objectID")))
+            else:
+                old = page.find(node.tag)
+            if old is not None:
+                page.replace(old, node)
+            else:
+                page.append(node)
+        declaration = ' xmlns:one="{}"'.format(NS)
+        self.pages[page.get("ID")] = "".join(ET.tostring(node, encoding="unicode").replace(declaration, "")
+                                             for node in page)
+
+    def DeleteHierarchy(self, object_id, expect_last_modified):
+        self.calls.append(("DeleteHierarchy", (object_id,)))
+        self.pages.pop(object_id, None)
+        self.modified.pop(object_id, None)
+
+    def FindPages(self, start_node_id, search_string, ignored, offline, display):
+        """The hierarchy below start_node_id, with the pages containing search_string"""
+        self.calls.append(("FindPages", (start_node_id, search_string)))
+        root = ET.fromstring(self.GetHierarchy(start_node_id, 4).encode("utf-8"))
+        self.calls.pop()
+        for page in list(root.iter("{%s}Page" % NS)):
+            if search_string not in self.pages.get(page.get("ID"), ""):
+                page.getparent().remove(page)
+        return ET.tostring(root, encoding="unicode")
@@ -0,0 +1,82 @@
+"""
+Attachment export to a content-addressed store, runs without OneNote
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from onepy import OneNote, export_attachments
+from tests.fake import FakeOneNote, notebooks, page_entry
+
+
+def inserted_file(object_id, path, name):
+    return '<one:InsertedFile objectID="{}" pathCache="{}" preferredName="{}"/>'.format(object_id, path, name)
+
+
+class TestAttachments(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.dest = os.path.join(self.folder, "out")
+        self.report = self.source("report.pdf", b"report")
+        self.copy = self.source("copy.pdf", b"report")
+        self.other = self.source("other.pdf", b"other")
+        pages = {
+            "{P1}": inserted_file("{F1}", self.report, "report.pdf") + inserted_file("{F2}", self.other, "report.pdf"),
+            "{P2}": inserted_file("{F3}", self.copy, "report.pdf"),
+        }
+        hierarchy = notebooks('<one:Notebook name="N" ID="{N1}">'
+                              '<one:Section name="A" ID="{S1}">' + page_entry("{P1}", "Notes") + '</one:Section>'
+                              '<one:Section name="B" ID="{S2}">' + page_entry("{P2}", "Notes") + '</one:Section>'
+                              '</one:Notebook>')
+        self.backend = FakeOneNote(pages, hierarchy)
+        self.on = OneNote(version=15, backend=self.backend)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def source(self, name, data):
+        path = os.path.join(self.folder, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def files(self, manifest):
+        return {obj["object_id"]: os.path.join(self.dest, obj["file"]) for obj in manifest["objects"]}
+
+    def test_layout(self):
+        files = self.files(export_attachments(self.on, self.dest))
+        self.assertEqual(files["{F1}"], os.path.join(self.dest, "pages", "N", "A", "Notes", "report.pdf"))
+        self.assertEqual(files["{F2}"], os.path.join(self.dest, "pages", "N", "A", "Notes", "report {F2}.pdf"))
+        self.assertEqual(files["{F3}"], os.path.join(self.dest, "pages", "N", "B", "Notes", "report.pdf"))
+        with open(files["{F2}"], "rb") as f:
+            self.assertEqual(f.read(), b"other")
+
+    def test_same_content_is_stored_once(self):
+        manifest = export_attachments(self.on, self.dest)
+        files = self.files(manifest)
+        hashes = {obj["object_id"]: obj["hash"] for obj in manifest["objects"]}
+        self.assertEqual(hashes["{F1}"], hashes["{F3}"])
+        self.assertNotEqual(hashes["{F1}"], hashes["{F2}"])
+        self.assertTrue(os.path.samefile(files["{F1}"], files["{F3}"]))
+        self.assertEqual(os.stat(files["{F1}"]).st_nlink, 3)
+        blobs = [name for _, _, names in os.walk(os.path.join(self.dest, "blobs")) for name in names]
+        self.assertEqual(len(blobs), 2)
+
+    def test_unchanged_source_is_not_read(self):
+        first = export_attachments(self.on, self.dest)
+        stat = os.stat(self.report)
+        with open(self.report, "wb") as f:
+            f.write(b"REPORT")
+        os.utime(self.report, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        second = export_attachments(self.on, self.dest)
+        self.assertEqual(first["objects"][0]["hash"], second["objects"][0]["hash"])
+        with open(os.path.join(self.dest, "manifest.json"), encoding="utf-8") as f:
+            self.assertEqual(json.load(f), second)
+
+
+if __name__ == '__main__':
+    unittest.main()
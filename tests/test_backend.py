@@ -0,0 +1,85 @@
+"""
+Record/replay backend, runs without OneNote
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from onepy import OneNote, PageEditor, RecordingBackend, ReplayBackend
+from onepy.backend import RecordedError
+from onepy.supervisor import is_busy
+from tests.fake import FakeOneNote
+
+BUSY = -2147418111
+
+PAGE = """<one:Title><one:OE><one:T>Today</one:T></one:OE></one:Title>
+<one:Outline objectID="{O1}"><one:OEChildren><one:OE objectID="{E1}"><one:T>first</one:T></one:OE></one:OEChildren></one:Outline>"""
+
+
+class BusyOneNote(FakeOneNote):
+
+    def GetSpecialLocation(self, special_location):
+        raise Exception(BUSY, "Call was rejected by callee.")
+
+
+class TestRecordReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, "session.jsonl.gz")
+        with RecordingBackend(BusyOneNote({"{P1}": PAGE}), self.path) as backend:
+            on = OneNote(version=15, backend=backend)
+            on.get_page_content("{P1}")
+            with self.assertRaises(Exception):
+                on.process.get_page_content("{P2}")
+            editor = PageEditor(version=15, backend=backend)
+            editor.open(on.hierarchy[0][0][0])
+            editor.append_lines(["second"])
+            with self.assertRaises(Exception):
+                backend.GetSpecialLocation(0)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_replay_session(self):
+        backend = ReplayBackend(self.path)
+        on = OneNote(version=15, backend=backend)
+        self.assertEqual(on.hierarchy[0][0][0].name, "{P1}")
+        content = on.get_page_content("{P1}")
+        self.assertEqual(content[1][0].text, "first")
+        editor = PageEditor(version=15, backend=backend)
+        editor.open(on.hierarchy[0][0][0])
+        editor.append_lines(["second"])
+
+    def test_replay_error(self):
+        on = OneNote(version=15, backend=ReplayBackend(self.path))
+        with self.assertRaises(RecordedError):
+            on.process.get_page_content("{P2}")
+
+    def test_writes_match_by_order(self):
+        backend = ReplayBackend(self.path)
+        on = OneNote(version=15, backend=backend)
+        editor = PageEditor(version=15, backend=backend)
+        editor.open(on.hierarchy[0][0][0])
+        editor.append_lines(["serialized differently"])
+        exact = ReplayBackend(self.path, exact_writes=True)
+        with self.assertRaises(RecordedError):
+            exact.UpdatePageContent("<one:Page/>", "1899-12-30T00:00:00+00:00")
+
+    def test_replay_keeps_error_args(self):
+        with self.assertRaises(RecordedError) as raised:
+            ReplayBackend(self.path).GetSpecialLocation(0)
+        self.assertEqual(raised.exception.args, (BUSY, "Call was rejected by callee."))
+        self.assertEqual(raised.exception.hresult, BUSY)
+        self.assertTrue(is_busy(raised.exception))
+
+    def test_unrecorded_call(self):
+        on = OneNote(version=15, backend=ReplayBackend(self.path))
+        with self.assertRaises(RecordedError):
+            on.process.get_page_content("{P3}")
+
+
+if __name__ == '__main__':
+    unittest.main()
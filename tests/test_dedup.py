@@ -0,0 +1,67 @@
+"""
+Near-duplicate detection, runs without OneNote
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from onepy import OneNote
+from tests.fake import FakeOneNote
+
+try:
+    import numpy
+    from onepy.dedup import find_duplicates, MinHasher
+except ImportError:
+    numpy = None
+
+MEETING = ("weekly meeting notes the team reviewed the release plan agreed to ship the "
+           "new importer on friday and to move the database migration to next sprint "
+           "alice will update the changelog and bob will prepare the demo for the customer")
+
+TEXTS = {
+    "{P1}": MEETING,
+    "{P2}": MEETING + " bob is out on monday",
+    "{P3}": "shopping list apples pears bread milk eggs cheese coffee and a new kettle",
+    "{P4}": "",
+}
+
+PAGES = {page_id: "<one:Outline><one:OEChildren><one:OE><one:T>{}</one:T></one:OE>"
+                  "</one:OEChildren></one:Outline>".format(text) for page_id, text in TEXTS.items()}
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestDedup(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = FakeOneNote(PAGES)
+        self.on = OneNote(version=15, backend=self.backend)
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_signature_similarity(self):
+        hasher = MinHasher(num_perm=256)
+        a, b = hasher.signature(TEXTS["{P1}"]), hasher.signature(TEXTS["{P2}"])
+        self.assertGreater((a == b).mean(), 0.7)
+        self.assertLess((a == hasher.signature(TEXTS["{P3}"])).mean(), 0.2)
+        self.assertIsNone(hasher.signature(""))
+
+    def test_clusters(self):
+        clusters = find_duplicates(self.on, threshold=0.7)
+        self.assertEqual([sorted(c.page_ids) for c in clusters], [["{P1}", "{P2}"]])
+        self.assertEqual(sorted(p.name for p in clusters[0]), ["{P1}", "{P2}"])
+
+    def test_unchanged_pages_are_not_rehashed(self):
+        store = os.path.join(self.folder, "signatures.npz")
+        first = find_duplicates(self.on, threshold=0.7, store_path=store)
+        self.backend.calls = []
+        second = find_duplicates(self.on, threshold=0.7, store_path=store)
+        self.assertEqual(self.backend.called("GetPageContent"), [])
+        self.assertEqual([c.page_ids for c in first], [c.page_ids for c in second])
+
+
+if __name__ == '__main__':
+    unittest.main()
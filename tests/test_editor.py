@@ -0,0 +1,77 @@
+"""
+Appending lines with PageEditor, runs without OneNote
+"""
+
+import unittest
+
+import lxml.etree as ET
+
+from onepy import OneNote, PageEditor
+from tests.fake import FakeOneNote, NS
+
+
+def outline(object_id, *lines):
+    return '<one:Outline objectID="{}"><one:OEChildren>{}</one:OEChildren></one:Outline>'.format(
+        object_id, "".join('<one:OE objectID="{{E-{0}}}"><one:T>{0}</one:T></one:OE>'.format(line) for line in lines))
+
+
+PAGE = "<one:Title><one:OE><one:T>Log</one:T></one:OE></one:Title>" + outline("{O1}", "a") + outline("{O2}", "b")
+
+
+class TestAppendLines(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = FakeOneNote({"{P1}": PAGE})
+        on = OneNote(version=15, backend=self.backend)
+        self.editor = PageEditor(version=15, backend=self.backend)
+        self.editor.open(on.hierarchy[0][0][0])
+
+    def fetches(self):
+        return len(self.backend.called("GetPageContent"))
+
+    def test_update_documents(self):
+        fetches = self.fetches()
+        self.editor.append_lines(("line {}".format(n) for n in range(5)), chunk_size=2)
+        self.assertEqual(len(self.backend.updates), 3)
+        new, kept = [], []
+        for update in self.backend.updates:
+            self.assertTrue(update.startswith(b'<?xml version="1.0"?>\n<one:Page '))
+            self.assertEqual(update.count(b"xmlns:"), 1)
+            self.assertNotIn(b"ns0", update)
+            page = ET.fromstring(update)
+            self.assertEqual(page.get("ID"), "{P1}")
+            outlines = page.findall("{%s}Outline" % NS)
+            self.assertEqual([o.get("objectID") for o in outlines], ["{O2}"])
+            oes = outlines[0].findall("{%s}OEChildren/{%s}OE" % (NS, NS))
+            new.append(sum(1 for oe in oes if oe.get("objectID") is None))
+            kept.append([oe.get("objectID") for oe in oes if oe.get("objectID") is not None])
+        self.assertEqual(new, [2, 2, 1])
+        self.assertEqual(kept, [["{E-b}"], ["{E-b}", "{new-1}", "{new-2}"],
+                                ["{E-b}", "{new-1}", "{new-2}", "{new-3}", "{new-4}"]])
+        self.assertEqual(ET.fromstring(self.backend.updates[-1]).findall(".//{%s}T" % NS)[-1].text, "line 4")
+        # the page is fetched again between chunks only
+        self.assertEqual(self.fetches(), fetches + 2)
+        self.assertEqual(self.editor.get_lines(), ["a", "b"] + ["line {}".format(n) for n in range(5)])
+
+    def test_outline_id(self):
+        self.editor.append_lines(["x"], outline_id="{O1}")
+        self.assertIn(b'objectID="{O1}"', self.backend.updates[0])
+
+    def test_flat_view_is_refreshed_lazily(self):
+        self.assertEqual(self.editor.get_lines(), ["a", "b"])
+        fetches = self.fetches()
+        self.editor.append_lines(["c"])
+        self.assertEqual(self.fetches(), fetches)
+        self.assertEqual(self.editor.get_lines(), ["a", "b", "c"])
+        self.assertEqual(self.editor.get_lines(), ["a", "b", "c"])
+        self.assertEqual(self.fetches(), fetches + 1)
+
+    def test_edits_after_append_use_the_new_page(self):
+        self.editor.append_lines(["c"])
+        self.editor.update_lines(["C"], start=2)
+        self.assertIn(b"<one:T>C</one:T>", self.backend.updates[-1])
+        self.assertIn(b"<one:T>a</one:T>", self.backend.updates[-1])
+        self.assertEqual(self.editor.get_lines(), ["a", "b", "C"])
+
+if __name__ == '__main__':
+    unittest.main()
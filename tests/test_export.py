@@ -0,0 +1,108 @@
+"""
+Markdown and HTML export, runs without OneNote
+"""
+
+import base64
+import os
+import shutil
+import tempfile
+import unittest
+
+from onepy import OneNote, export_pages
+from onepy.export import render_page, _page_file
+from tests.fake import FakeOneNote, NS, MODIFIED, notebooks, page_entry
+
+IMAGE = base64.b64encode(b"png").decode()
+
+BODY = ('<one:Title><one:OE><one:T><![CDATA[Plan <b>A</b>]]></one:T></one:OE></one:Title>'
+        '<one:Outline><one:OEChildren>'
+        '<one:OE><one:T><![CDATA[first <a href="https://x.org/?a=1&amp;b=2">link</a> &amp; more]]></one:T>'
+        '<one:OEChildren><one:OE><one:T>child</one:T></one:OE>'
+        '<one:OE><one:Image objectID="{I1}" format="png"><one:Data>' + IMAGE + '</one:Data></one:Image></one:OE>'
+        '</one:OEChildren></one:OE>'
+        '<one:OE><one:InsertedFile pathSource="c:\\docs\\spec.pdf" preferredName="spec.pdf"/></one:OE>'
+        '</one:OEChildren></one:Outline>')
+
+PAGE = '<one:Page xmlns:one="{}" ID="{{P1}}" name="Plan">{}</one:Page>'.format(NS, BODY)
+
+
+def hierarchy(modified=MODIFIED):
+    return notebooks('<one:Notebook name="N" ID="{N1}"><one:Section name="S" ID="{S1}">'
+                     + page_entry("{P1}", "Plan", modified) + page_entry("{P2}", "Plan")
+                     + '</one:Section></one:Notebook>')
+
+
+class TestRender(unittest.TestCase):
+
+    def render(self, fmt):
+        return render_page((PAGE, "{%s}" % NS, fmt, "Plan_files"))
+
+    def test_markdown(self):
+        text, images = self.render("md")
+        self.assertEqual(text.splitlines(), [
+            "# Plan A",
+            "- first [link](https://x.org/?a=1&b=2) & more",
+            "  - child",
+            "  - ![](Plan_files/%7BI1%7D.png)",
+            "- [spec.pdf](<file:///c:/docs/spec.pdf>)",
+        ])
+        self.assertEqual(images, [("{I1}.png", b"png")])
+
+    def test_html(self):
+        text, images = self.render("html")
+        lines = text.splitlines()
+        self.assertEqual(lines[0], '<html><head><meta charset="utf-8"><title>Plan</title></head><body>')
+        self.assertEqual(lines[1], "<h1>Plan <b>A</b></h1>")
+        self.assertIn('first <a href="https://x.org/?a=1&amp;b=2">link</a> &amp; more', lines)
+        self.assertEqual(lines.count("<ul>"), 2)
+        self.assertEqual(lines.count("<li>"), lines.count("</li>"))
+        self.assertIn('<img src="Plan_files/%7BI1%7D.png">', lines)
+        self.assertIn('<a href="file:///c:/docs/spec.pdf">spec.pdf</a>', lines)
+        self.assertEqual(lines[-1], "</body></html>")
+        self.assertEqual(images, [("{I1}.png", b"png")])
+
+
+class TestExport(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.backend = FakeOneNote({"{P1}": BODY, "{P2}": "<one:Outline/>"}, hierarchy())
+        self.on = OneNote(version=15, backend=self.backend)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def export(self, **options):
+        return export_pages(self.on, self.folder, workers=1, **options)
+
+    def test_layout_and_images(self):
+        written = self.export(include_images=True)
+        first, second = os.path.join("N", "S", "Plan.md"), os.path.join("N", "S", "Plan {P2}.md")
+        self.assertEqual(written, [first, second])
+        with open(os.path.join(self.folder, "N", "S", "Plan_files", "{I1}.png"), "rb") as f:
+            self.assertEqual(f.read(), b"png")
+        self.assertEqual(self.backend.called("GetPageContent"), [("{P1}", 1), ("{P2}", 1)])
+
+    def test_small_window(self):
+        written = self.export(chunksize=1)
+        self.assertEqual(written, [os.path.join("N", "S", "Plan.md"), os.path.join("N", "S", "Plan {P2}.md")])
+        self.assertEqual(self.export(chunksize=1), [])
+
+    def test_unchanged_pages_are_skipped(self):
+        self.export()
+        self.assertEqual(self.export(), [])
+        self.backend.hierarchy = hierarchy("2016-02-01T00:00:00.000Z")
+        self.on.refresh()
+        self.assertEqual(self.export(), [os.path.join("N", "S", "Plan.md")])
+        self.assertEqual(len(self.export(fmt="html")), 2)
+
+    def test_page_file_collision(self):
+        first, second = self.on.pages()
+        used = set()
+        used.add(_page_file(first, "md", used))
+        self.assertEqual(_page_file(second, "md", used), os.path.join("N", "S", "Plan {P2}.md"))
+        self.assertEqual(_page_file(second, "html", used), os.path.join("N", "S", "Plan.html"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+Page search and its cache, runs without OneNote
+"""
+
+import itertools
+import unittest
+
+from onepy import OneNote
+from tests.fake import FakeOneNote
+
+PAGES = {
+    "{P1}": "<one:Outline><one:OEChildren><one:OE><one:T>apples and pears</one:T></one:OE></one:OEChildren></one:Outline>",
+    "{P2}": "<one:Outline><one:OEChildren><one:OE><one:T>apples only</one:T></one:OE></one:OEChildren></one:Outline>",
+    "{P3}": "<one:Outline><one:OEChildren><one:OE><one:T>bread</one:T></one:OE></one:OEChildren></one:Outline>",
+}
+
+
+class TestFindPages(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = FakeOneNote(PAGES)
+        self.on = OneNote(version=15, backend=self.backend)
+
+    def searches(self):
+        return len(self.backend.called("FindPages"))
+
+    def test_hits(self):
+        hits = list(self.on.find_pages("apples"))
+        self.assertEqual([hit.id for hit in hits], ["{P1}", "{P2}"])
+        self.assertEqual({hit.section_id for hit in hits}, {"{S1}"})
+        self.assertIs(hits[0].page, self.on.hierarchy[0][0][0])
+        self.assertEqual(list(self.on.find_pages("nothing")), [])
+
+    def test_scope(self):
+        section = self.on.hierarchy[0][0]
+        self.assertEqual([hit.id for hit in self.on.find_pages("bread", section)], ["{P3}"])
+        self.assertEqual(self.backend.called("FindPages"), [("{S1}", "bread")])
+
+    def test_partial_iteration_is_cached(self):
+        first = next(self.on.find_pages("apples"))
+        self.assertEqual(first.id, "{P1}")
+        hits = list(itertools.islice(self.on.find_pages("apples"), 5))
+        self.assertEqual([hit.id for hit in hits], ["{P1}", "{P2}"])
+        self.assertEqual(self.searches(), 1)
+
+    def test_ttl_expiry(self):
+        self.on.find_cache_ttl = 0
+        list(self.on.find_pages("apples"))
+        list(self.on.find_pages("apples"))
+        self.assertEqual(self.searches(), 2)
+
+    def test_hierarchy_change_invalidates(self):
+        list(self.on.find_pages("apples"))
+        self.on.process.delete_hierarchy("{P2}")
+        self.assertEqual([hit.id for hit in self.on.find_pages("apples")], ["{P1}"])
+        self.assertEqual(self.searches(), 2)
+
+    def test_hits_are_not_linked_to_stale_pages(self):
+        self.on.process.delete_hierarchy("{P2}")
+        hits = list(self.on.find_pages("apples"))
+        self.assertEqual([(hit.id, hit.page) for hit in hits], [("{P1}", None)])
+        self.on.refresh()
+        hits = list(self.on.find_pages("apples"))
+        self.assertIs(hits[0].page, self.on.hierarchy[0][0][0])
+
+    def test_refresh_invalidates(self):
+        list(self.on.find_pages("apples"))
+        self.on.refresh()
+        list(self.on.find_pages("apples"))
+        self.assertEqual(self.searches(), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
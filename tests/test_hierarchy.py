@@ -0,0 +1,82 @@
+"""
+Notebook filters, hierarchy depth and recycle bins, runs without OneNote
+"""
+
+import unittest
+
+from onepy import OneNote
+from tests.fake import FakeOneNote, notebooks, page_entry
+
+
+def notebook(name, nickname, notebook_id, body=""):
+    return '<one:Notebook name="{}" nickname="{}" ID="{}">{}</one:Notebook>'.format(name, nickname, notebook_id, body)
+
+
+RECYCLE_BIN = ('<one:SectionGroup name="OneNote_RecycleBin" ID="{G1}" isRecycleBin="true">'
+               '<one:Section name="Deleted Pages" ID="{S9}" isDeletedPages="true">'
+               + page_entry("{P9}", "Deleted") + '</one:Section></one:SectionGroup>')
+
+HIERARCHY = notebooks(
+    notebook("Work", "W", "{N1}", '<one:Section name="Log" ID="{S1}">' + page_entry("{P1}", "Today")
+             + '</one:Section>' + RECYCLE_BIN)
+    + notebook("Home", "H", "{N2}", '<one:Section name="Todo" ID="{S2}">' + page_entry("{P2}", "Shop")
+               + '</one:Section>')
+    + notebook("Old", "Archive", "{N3}"))
+
+
+class TestHierarchy(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = FakeOneNote(hierarchy=HIERARCHY)
+
+    def onenote(self, **options):
+        return OneNote(version=15, backend=self.backend, **options)
+
+    def names(self, on):
+        return [notebook.name for notebook in on.hierarchy]
+
+    def test_include_and_exclude(self):
+        self.assertEqual(self.names(self.onenote(include="Work")), ["Work"])
+        self.assertEqual(self.names(self.onenote(include=["H", "{N3}"])), ["Home", "Old"])
+        self.assertEqual(self.names(self.onenote(exclude=["Archive", "{N1}"])), ["Home"])
+        self.assertEqual(self.names(self.onenote(include=["Work", "Home"], exclude="H")), ["Work"])
+
+    def test_only_wanted_notebooks_are_fetched(self):
+        on = self.onenote(include="Work")
+        self.assertEqual(self.backend.called("GetHierarchy"), [("", 2), ("{N1}", 4)])
+        self.assertEqual([page.name for page in on.pages()], ["Today"])
+
+    def test_max_depth(self):
+        for max_depth, scope in ((1, 2), (2, 3), (3, 4), (None, 4), (9, 4)):
+            self.backend.calls = []
+            self.onenote(max_depth=max_depth)
+            self.assertEqual(self.backend.called("GetHierarchy"), [("", scope)])
+        self.backend.calls = []
+        self.onenote(include="Home", max_depth=1)
+        self.assertEqual(self.backend.called("GetHierarchy"), [("", 2)])
+
+    def test_recycle_bin(self):
+        on = self.onenote()
+        self.assertEqual(on.hierarchy[0].recycleBin.id, "{G1}")
+        self.assertEqual(len(on.query("//one:Page")), 3)
+        self.assertEqual(len(on.query("//one:Page[@ID = '{P9}']")), 1)
+
+    def test_skip_recycle_bin(self):
+        for options in ({}, {"include": "Work"}):
+            on = self.onenote(skip_recycle_bin=True, **options)
+            self.assertIsNone(on.hierarchy[0].recycleBin)
+            self.assertEqual(on.object_tree.xpath("//*[@isRecycleBin]"), [])
+            self.assertEqual(on.query("//one:Page[@ID = '{P9}']"), [])
+            self.assertEqual(on.object_tree.nsmap, {"one": "http://schemas.microsoft.com/office/onenote/2013/onenote"})
+
+    def test_refresh_reapplies_filters(self):
+        on = self.onenote(exclude="Old", skip_recycle_bin=True)
+        self.backend.hierarchy = HIERARCHY.replace(
+            "</one:Notebooks>", notebook("Old", "Archive", "{N4}") + notebook("New", "New", "{N5}") + "</one:Notebooks>")
+        on.refresh()
+        self.assertEqual(self.names(on), ["Work", "Home", "New"])
+        self.assertIsNone(on.hierarchy[0].recycleBin)
+
+
+if __name__ == '__main__':
+    unittest.main()
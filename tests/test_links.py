@@ -0,0 +1,112 @@
+"""
+Link graph between pages, runs without OneNote
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from onepy import OneNote, LinkGraph, HyperlinkResolver
+from tests.fake import FakeOneNote
+
+GUIDS = {"{S1}": "{5e000000-0000-0000-0000-000000000001}",
+         "{P1}": "{aa000000-0000-0000-0000-000000000001}",
+         "{P2}": "{aa000000-0000-0000-0000-000000000002}",
+         "{P3}": "{aa000000-0000-0000-0000-000000000003}"}
+
+
+def hyperlink(object_id):
+    link = "onenote:https://d.docs.live.net/x/Notes/S.one#Title&section-id={}".format(GUIDS["{S1}"])
+    if object_id != "{S1}":
+        link += "&page-id={}".format(GUIDS[object_id].upper())
+    return link + "&end"
+
+
+def a(object_id, text="link"):
+    return '<a href="{}">{}</a>'.format(hyperlink(object_id).replace("&", "&amp;"), text)
+
+
+TEXTS = {
+    "{P1}": "see " + a("{P2}") + " and " + a("{P3}") + " and " + a("{S1}", "the section"),
+    "{P2}": "back to " + a("{P1}") + ' and <a href="onenote:https://elsewhere/Old.one#Gone&amp;page-id={00000000-0000-0000-0000-000000000000}&amp;end">gone</a>',
+    "{P3}": "no links, just <a href=\"https://example.com\">the web</a>",
+}
+
+
+PAGES = {page_id: "<one:Outline><one:OEChildren><one:OE><one:T><![CDATA[{}]]></one:T></one:OE>"
+                  "</one:OEChildren></one:Outline>".format(text) for page_id, text in TEXTS.items()}
+
+
+class LinkingOneNote(FakeOneNote):
+
+    def __init__(self, pages):
+        super().__init__(pages)
+        self.failing = set()
+
+    def GetHyperlinkToObject(self, object_id, target):
+        self.calls.append(("GetHyperlinkToObject", (object_id,)))
+        if object_id in self.failing:
+            raise Exception("Object not found")
+        return hyperlink(object_id)
+
+
+class TestLinks(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = LinkingOneNote(PAGES)
+        self.on = OneNote(version=15, backend=self.backend)
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_graph(self):
+        graph = LinkGraph.build(self.on)
+        self.assertEqual(sorted(graph.links("{P1}")), ["{P2}", "{P3}", "{S1}"])
+        self.assertEqual(graph.backlinks("{P1}"), ["{P2}"])
+        self.assertEqual(graph.backlinks("{S1}"), ["{P1}"])
+        self.assertEqual(graph.links("{P3}"), [])
+        self.assertEqual(graph.orphans(), [])
+        self.assertEqual([page for page, _ in graph.broken_links()], ["{P2}"])
+
+    def test_orphans(self):
+        pages = [p for p in self.on.pages() if p.id != "{P2}"]
+        graph = LinkGraph.build(self.on, pages)
+        self.assertEqual(graph.orphans(), ["{P1}"])
+
+    def test_hyperlinks_are_memoized(self):
+        path = os.path.join(self.folder, "links.json")
+        LinkGraph.build(self.on, resolver=HyperlinkResolver(self.on.process, path))
+        self.assertEqual(len(self.backend.called("GetHyperlinkToObject")), 4)
+        LinkGraph.build(self.on, resolver=HyperlinkResolver(self.on.process, path))
+        self.assertEqual(len(self.backend.called("GetHyperlinkToObject")), 4)
+
+    def test_failed_hyperlinks_are_retried(self):
+        path = os.path.join(self.folder, "links.json")
+        self.backend.failing.add("{P3}")
+        graph = LinkGraph.build(self.on, resolver=HyperlinkResolver(self.on.process, path))
+        self.assertEqual(self.backend.called("GetHyperlinkToObject").count(("{P3}",)), 1)
+        self.assertIn(("{P1}", hyperlink("{P3}")), graph.broken_links())
+        with open(path, encoding="utf-8") as f:
+            self.assertNotIn("{P3}", json.load(f))
+        self.backend.failing.clear()
+        graph = LinkGraph.build(self.on, resolver=HyperlinkResolver(self.on.process, path))
+        self.assertEqual(self.backend.called("GetHyperlinkToObject").count(("{P3}",)), 2)
+        self.assertIn("{P3}", graph.links("{P1}"))
+        self.assertEqual(len(self.backend.called("GetHyperlinkToObject")), 5)
+
+    def test_deleted_pages_are_broken_links(self):
+        path = os.path.join(self.folder, "links.json")
+        LinkGraph.build(self.on, resolver=HyperlinkResolver(self.on.process, path))
+        self.on.process.delete_hierarchy("{P2}")
+        self.on.refresh()
+        graph = LinkGraph.build(self.on, resolver=HyperlinkResolver(self.on.process, path))
+        self.assertEqual(sorted(graph.links("{P1}")), ["{P3}", "{S1}"])
+        self.assertEqual(graph.broken_links(), [("{P1}", hyperlink("{P2}"))])
+        self.assertEqual(len(self.backend.called("GetHyperlinkToObject")), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+"""
+Media playlist, indices and timeline, runs without OneNote
+"""
+
+import unittest
+
+from onepy import OneNote
+from tests.fake import FakeOneNote
+
+PAGE = """<one:MediaPlaylist><one:MediaReference mediaID="{M1}"/></one:MediaPlaylist>
+<one:Outline objectID="{O1}"><one:OEChildren>
+<one:OE objectID="{E1}"><one:MediaFile pathCache="c:\\cache\\rec.wma" preferredName="rec.wma" objectID="{F1}"><one:MediaReference mediaID="{M1}"/></one:MediaFile></one:OE>
+<one:OE objectID="{E2}"><one:T>intro</one:T><one:MediaIndex timeIndex="12.5"><one:MediaReference mediaID="{M1}"/></one:MediaIndex>
+<one:OEChildren><one:OE objectID="{E3}"><one:T>detail</one:T><one:MediaIndex timeIndex="40"><one:MediaReference mediaID="{M1}"/></one:MediaIndex></one:OE></one:OEChildren></one:OE>
+<one:OE objectID="{E4}"><one:T>summary</one:T><one:MediaIndex timeIndex="3.0"><one:MediaReference mediaID="{M1}"/></one:MediaIndex></one:OE>
+</one:OEChildren></one:Outline>"""
+
+
+class TestMedia(unittest.TestCase):
+
+    def setUp(self):
+        on = OneNote(version=15, backend=FakeOneNote({"{P1}": PAGE}))
+        self.content = on.get_page_content("{P1}")
+
+    def test_media_objects(self):
+        self.assertEqual([r.media_id for r in self.content.media_playlist], ["{M1}"])
+        media_file = self.content[0][0].files[0]
+        self.assertEqual(media_file.preferred_name, "rec.wma")
+        self.assertEqual(media_file.media_reference.media_id, "{M1}")
+        index = self.content[0][1].media_indices[0]
+        self.assertEqual((index.time_index, index.media_reference.media_id), ("12.5", "{M1}"))
+
+    def test_timeline(self):
+        timeline = self.content.timeline()
+        self.assertEqual(timeline.times, [3.0, 12.5, 40.0])
+        self.assertEqual(timeline.note_at(1), None)
+        self.assertEqual(timeline.note_at(12.5), (12.5, "{E2}", "{M1}"))
+        self.assertEqual(timeline.note_at(39), (12.5, "{E2}", "{M1}"))
+        self.assertEqual([p[1] for p in timeline.notes_between(0, 40)], ["{E4}", "{E2}"])
+        self.assertEqual(timeline.offset_of("{E3}"), (40.0, "{M1}"))
+        self.assertEqual(timeline.offset_of("{E1}"), None)
+
+
+if __name__ == '__main__':
+    unittest.main()
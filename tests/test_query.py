@@ -0,0 +1,68 @@
+"""
+XPath queries over the hierarchy and page content, runs without OneNote
+"""
+
+import datetime
+import unittest
+
+from onepy import OneNote
+from onepy.onepy import OE, Page
+from tests.fake import FakeOneNote, notebooks, page_entry
+
+HIERARCHY = notebooks('<one:Notebook name="N" ID="{N1}"><one:Section name="S" ID="{S1}">'
+                      + page_entry("{P1}", "Todo", "2016-01-20T10:11:12.000Z")
+                      + page_entry("{P2}", "Todo later", "2016-03-01T08:00:00.000Z")
+                      + '</one:Section></one:Notebook>')
+
+PAGE = ('<one:Outline><one:OEChildren>'
+        '<one:OE objectID="{E1}"><one:T>buy milk</one:T>'
+        '<one:OEChildren><one:OE objectID="{E2}"><one:T>and bread</one:T></one:OE></one:OEChildren></one:OE>'
+        '<one:OE objectID="{E3}"><one:T>call bob</one:T></one:OE>'
+        '</one:OEChildren></one:Outline>')
+
+
+class TestQuery(unittest.TestCase):
+
+    def setUp(self):
+        self.on = OneNote(version=15, backend=FakeOneNote({"{P1}": PAGE, "{P2}": ""}, HIERARCHY))
+        self.section = self.on.hierarchy[0][0]
+
+    def test_variables(self):
+        self.assertEqual(self.on.query("//one:Page[@name = $name]", name="Todo"), [self.section[0]])
+        self.assertEqual(self.on.pages_named("Todo"), list(self.section))
+        self.assertEqual(self.on.query("//one:Page[@name = $name]", name="Nothing"), [])
+
+    def test_loaded_objects(self):
+        self.assertIs(self.on.query("//one:Section")[0], self.section)
+        self.assertIs(self.on.query("//one:Page[@ID = '{P2}']")[0], self.section[1])
+
+    def test_other_results(self):
+        self.assertEqual(self.on.query("count(//one:Page)"), 2)
+        self.assertEqual(self.on.query("//one:Page/@name"), ["Todo", "Todo later"])
+        self.assertEqual(self.on.query("string(//one:Section/@ID)"), "{S1}")
+
+    def test_page_content(self):
+        content = self.on.get_page_content("{P1}")
+        oes = content.oes_containing("b")
+        self.assertEqual([oe.id for oe in oes], ["{E1}", "{E2}", "{E3}"])
+        self.assertTrue(all(isinstance(oe, OE) for oe in oes))
+        self.assertEqual([oe.id for oe in content.oes_containing("bread")], ["{E2}"])
+        self.assertEqual(content.query("//one:T/text()"), ["buy milk", "and bread", "call bob"])
+        self.assertIsInstance(content.query("/one:Page")[0], Page)
+
+    def test_pages_modified_since(self):
+        def modified_since(since):
+            return [page.id for page in self.on.pages_modified_since(since)]
+
+        self.assertEqual(modified_since("2016-02-01T00:00:00.000Z"), ["{P2}"])
+        self.assertEqual(modified_since(datetime.datetime(2016, 1, 20, 10, 0)), ["{P1}", "{P2}"])
+        # 11:00 in UTC+2 is 09:00 UTC, before {P1} was modified
+        utc_plus_2 = datetime.timezone(datetime.timedelta(hours=2))
+        self.assertEqual(modified_since(datetime.datetime(2016, 1, 20, 11, 0, tzinfo=utc_plus_2)), ["{P1}", "{P2}"])
+        utc_minus_5 = datetime.timezone(datetime.timedelta(hours=-5))
+        self.assertEqual(modified_since(datetime.datetime(2016, 3, 1, 2, 0, tzinfo=utc_minus_5)), ["{P2}"])
+        self.assertEqual(modified_since(datetime.datetime(2016, 3, 1, 4, 0, tzinfo=utc_minus_5)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
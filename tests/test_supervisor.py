@@ -0,0 +1,126 @@
+"""
+Deadlines and retries of supervised calls, runs without OneNote
+"""
+
+import threading
+import time
+import unittest
+
+from onepy import ONProcess, ONTimeoutError
+from tests.fake import FakeOneNote, notebooks
+
+HIERARCHY = notebooks("")
+
+
+class BusyError(Exception):
+
+    def __init__(self):
+        super().__init__(-2147418111, "Call was rejected by callee.")
+
+
+class HangingOneNote(FakeOneNote):
+    """Hangs on Publish until released, rejects the first calls to FindPages"""
+
+    def __init__(self, release, busy_calls=0):
+        super().__init__(hierarchy=HIERARCHY)
+        self.release = release
+        self.busy_calls = busy_calls
+        self.thread = None
+
+    def GetHierarchy(self, start_node_id, scope):
+        self.thread = threading.current_thread()
+        return super().GetHierarchy(start_node_id, scope)
+
+    def Publish(self, *args):
+        self.release.wait()
+
+    def FindPages(self, *args):
+        if self.busy_calls:
+            self.busy_calls -= 1
+            raise BusyError()
+        return HIERARCHY
+
+
+class TestSupervisor(unittest.TestCase):
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.created = []
+
+    def tearDown(self):
+        self.release.set()
+
+    def process(self, busy_calls=0, **options):
+        def factory():
+            self.created.append(HangingOneNote(self.release, busy_calls))
+            return self.created[-1]
+        return ONProcess(backend_factory=factory, **options)
+
+    def test_calls_run_on_worker(self):
+        process = self.process(timeout=5)
+        self.assertEqual(process.get_hierarchy(), HIERARCHY)
+        self.assertIsNot(self.created[0].thread, threading.current_thread())
+
+    def test_deadline_recycles_worker(self):
+        process = self.process(timeouts={"Publish": 0.2})
+        start = time.time()
+        with self.assertRaises(ONTimeoutError):
+            process.publish("{S1}", "out.pdf", 3)
+        self.assertLess(time.time() - start, 2)
+        self.assertEqual(process.get_hierarchy(), HIERARCHY)
+        self.assertEqual(len(self.created), 2)
+        self.assertEqual(process.process.recycled, 1)
+
+    def test_concurrent_deadlines_recycle_each_worker(self):
+        process = self.process(timeouts={"Publish": 0.3})
+        errors = []
+
+        def publish():
+            try:
+                process.publish("{S1}", "out.pdf", 3)
+            except ONTimeoutError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=publish) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.05)
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(errors), 2)
+        self.assertEqual(process.process.recycled, 2)
+        self.assertEqual(process.get_hierarchy(), HIERARCHY)
+        self.assertEqual(len(self.created), 3)
+
+    def test_queued_call_is_cancelled(self):
+        process = self.process(timeouts={"Publish": 5, "UpdatePageContent": 0.2})
+        publish = threading.Thread(target=process.publish, args=("{S1}", "out.pdf", 3))
+        publish.start()
+        time.sleep(0.05)
+        with self.assertRaises(ONTimeoutError):
+            process.update_page_content("<one:Page/>")
+        self.assertEqual(process.process.recycled, 0)
+        self.release.set()
+        publish.join(5)
+        self.assertEqual(process.get_hierarchy(), HIERARCHY)
+        self.assertEqual(self.created[0].updates, [])
+        self.assertEqual(len(self.created), 1)
+
+    def test_backend_needs_factory(self):
+        with self.assertRaises(Exception):
+            ONProcess(backend=HangingOneNote(self.release), timeout=5)
+
+    def test_retry_when_busy(self):
+        process = self.process(busy_calls=2, retries=3)
+        process.process.backoff = 0.01
+        self.assertEqual(process.find_pages("", "x", False), HIERARCHY)
+
+    def test_gives_up_when_still_busy(self):
+        process = self.process(busy_calls=5, retries=1)
+        process.process.backoff = 0.01
+        self.assertIsNone(process.find_pages("", "x", False))
+        self.assertEqual(self.created[0].busy_calls, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Table parsing and column extraction, runs without OneNote
+"""
+
+import unittest
+
+from onepy import OneNote
+from onepy.onepy import _infer_column
+from tests.fake import FakeOneNote
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def cell(text):
+    return "<one:Cell><one:OEChildren><one:OE><one:T><![CDATA[{}]]></one:T></one:OE></one:OEChildren></one:Cell>".format(text)
+
+
+def row(*texts):
+    return "<one:Row>{}</one:Row>".format("".join(cell(t) for t in texts))
+
+
+PAGE = """<one:Outline><one:OEChildren><one:OE objectID="{E1}">
+<one:Table bordersVisible="true" hasHeaderRow="true" objectID="{T1}">
+<one:Columns><one:Column index="0" width="80"/><one:Column index="1" width="40"/><one:Column index="2" width="40"/><one:Column index="3" width="40"/></one:Columns>
+""" + row("item", "count", "price", "in stock") + row("<span style='font-weight:bold'>bolts</span>", "12", "0.5", "true") \
+    + row("nuts &amp; washers", "7", "", "false") + "<one:Row>" + cell("spare") + "</one:Row>" + """
+</one:Table></one:OE></one:OEChildren></one:Outline>"""
+
+
+class TestTable(unittest.TestCase):
+
+    def setUp(self):
+        content = OneNote(version=15, backend=FakeOneNote({"{P1}": PAGE})).get_page_content("{P1}")
+        self.table = content[0][0].table
+
+    def test_model(self):
+        self.assertEqual(self.table.id, "{T1}")
+        self.assertEqual(self.table.column_widths, [80, 40, 40, 40])
+        self.assertEqual(len(self.table), 4)
+        self.assertEqual(self.table[1][0].text, "bolts")
+        self.assertEqual(self.table[2][0][0].text, "nuts &amp; washers")
+
+    def test_columns(self):
+        columns = self.table.to_columns(skip_rows=1)
+        self.assertEqual(columns, [["bolts", "nuts & washers", "spare"], ["12", "7", ""],
+                                   ["0.5", "", ""], ["true", "false", ""]])
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_inferred_types(self):
+        item, count, price, stock = self.table.to_columns(skip_rows=1, infer_types=True)
+        self.assertEqual(item.tolist(), ["bolts", "nuts & washers", "spare"])
+        self.assertEqual(count.dtype, numpy.int64)
+        self.assertEqual(count.tolist(), [12, 7, None])
+        self.assertEqual(price.dtype, numpy.float64)
+        self.assertEqual(price.tolist(), [0.5, None, None])
+        self.assertEqual(stock.dtype, bool)
+        self.assertEqual(stock.tolist(), [True, False, None])
+        self.assertEqual(stock.count(), 2)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_columns_without_blanks(self):
+        self.assertNotIsInstance(_infer_column(["1", " 2"]), numpy.ma.MaskedArray)
+        self.assertEqual(_infer_column(["1", " 2"]).tolist(), [1, 2])
+        self.assertEqual(_infer_column(["True", "false"]).tolist(), [True, False])
+        self.assertEqual(_infer_column(["", " "]).tolist(), ["", " "])
+        self.assertEqual(_infer_column(["yes", ""]).tolist(), ["yes", ""])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+"""
+Tag parsing and the tag index, runs without OneNote
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from onepy import OneNote, TagIndex
+from tests.fake import FakeOneNote
+
+PAGES = {
+    "{P1}": """<one:TagDef index="0" type="0" symbol="3" name="To Do"/><one:TagDef index="1" type="1" symbol="13" name="Important"/>
+<one:Outline><one:OEChildren>
+<one:OE objectID="{E1}"><one:Tag index="0" completed="false"/><one:T>buy milk</one:T></one:OE>
+<one:OE objectID="{E2}"><one:Tag index="0" completed="true" completionDate="2016-01-20T10:11:12.000Z"/><one:T><![CDATA[<span>call bob</span>]]></one:T>
+<one:OEChildren><one:OE objectID="{E3}"><one:Tag index="1" completed="false"/><one:T>deadline friday</one:T></one:OE></one:OEChildren></one:OE>
+</one:OEChildren></one:Outline>""",
+    "{P2}": """<one:TagDef index="0" type="0" symbol="3" name="To Do"/>
+<one:Outline><one:OEChildren><one:OE objectID="{E4}"><one:Tag index="0" completed="false"/><one:T>write report</one:T></one:OE></one:OEChildren></one:Outline>""",
+}
+
+
+class TestTags(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = FakeOneNote(PAGES)
+        self.on = OneNote(version=15, backend=self.backend)
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, "tags.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_model(self):
+        content = self.on.get_page_content("{P1}")
+        self.assertEqual(content.tag_defs["1"].name, "Important")
+        done = content[0][1].tags[0]
+        self.assertTrue(done.completed)
+        self.assertEqual(done.completion_date, "2016-01-20T10:11:12.000Z")
+
+    def test_queries(self):
+        index = TagIndex()
+        self.assertEqual(index.update(self.on), 2)
+        self.assertEqual(len(index), 4)
+        self.assertEqual(sorted(e.text for e in index.todos()), ["buy milk", "write report"])
+        self.assertEqual([e.text for e in index.todos(completed=True)], ["call bob"])
+        self.assertEqual([e.object_id for e in index.find(name="Important")], ["{E3}"])
+
+    def test_incremental_update(self):
+        TagIndex(self.path).update(self.on)
+        self.backend.calls = []
+        self.backend.modified["{P2}"] = "2016-02-01T00:00:00.000Z"
+        del self.backend.modified["{P1}"]
+        self.on.refresh()
+        index = TagIndex(self.path)
+        self.assertEqual(index.update(self.on), 1)
+        self.assertEqual([args[0] for args in self.backend.called("GetPageContent")], ["{P2}"])
+        self.assertEqual([e.page_id for e in index], ["{P2}"])
+
+
+if __name__ == '__main__':
+    unittest.main()